@@ -11,6 +11,14 @@ from .cityjson import cityjson
 
 load_pointcloud = pointcloud.load
 save_pointcloud = pointcloud.save
+iter_pointcloud_chunks = pointcloud.iter_chunks
+aiter_pointcloud_chunks = pointcloud.aiter_chunks
+PointFilter = pointcloud.PointFilter
+Decimation = pointcloud.Decimation
+OutlierFilter = pointcloud.OutlierFilter
+CompactPoints = pointcloud.CompactPoints
+pointcloud_world_points = pointcloud.world_points
+clip_pointcloud_indices = pointcloud.clip_indices
 
 load_raster = raster.load
 save_raster = raster.save
@@ -49,6 +57,14 @@ __all__ = [
     "save_volume_mesh",
     "load_pointcloud",
     "save_pointcloud",
+    "iter_pointcloud_chunks",
+    "aiter_pointcloud_chunks",
+    "PointFilter",
+    "Decimation",
+    "OutlierFilter",
+    "CompactPoints",
+    "pointcloud_world_points",
+    "clip_pointcloud_indices",
     "load_raster",
     "save_raster",
     "load_city",
@@ -3,6 +3,7 @@
 
 # %%
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import shapely.geometry
@@ -15,7 +16,7 @@ from dtcc_model import City, Building, GeometryType, Surface
 import numpy as np
 
 from . import generic
-from .utils import get_epsg
+from . import vector_reader
 
 
 # from dtcc_model import Polygon, Building, LinearRing, Vector2D, City
@@ -51,45 +52,106 @@ def building_bounds(shp_footprint_file, buffer=0):
     return bbox
 
 
-def _building_from_fiona(
-    s, uuid_field="id", height_field="", crs="", overwrite_height=False
+def _parse_heights(properties, height_field=""):
+    heights = np.zeros(len(properties))
+    for i, p in enumerate(properties):
+        if height_field in p and p[height_field]:
+            try:
+                heights[i] = float(p[height_field])
+            except ValueError:
+                warning(f"Error cannot parse height field: {p[height_field]}")
+    return heights
+
+
+def _buildings_from_shapes(
+    shapes, properties, uuid_field="id", height_field="", crs="", overwrite_height=False
 ):
-    building = Building()
-
-    if uuid_field in s["properties"]:
-        building.id = str(s["properties"][uuid_field])
-    if height_field in s["properties"] and s["properties"][height_field]:
-        try:
-            height = float(s["properties"][height_field])
-        except ValueError:
-            warning(f"Error cannot parse height field: {s['properties'][height_field]}")
-            height = 0.0
-    else:
-        height = 0.0
-    polygon_footprint = shapely.geometry.shape(s["geometry"])
-    if not polygon_footprint.is_valid:
-        warning(f"Invalid polygon {building.id} attempting to fix...")
-        polygon_footprint = polygon_footprint.buffer(0)
-        if not polygon_footprint.is_valid:
-            error(f"Cannot fix invalid polygon {building.id}")
-            return None
-    polygon_footprint = shapely.geometry.polygon.orient(polygon_footprint, 1)
-
-    footprint_surface = Surface()
-
-    surface_verts = np.array(polygon_footprint.exterior.coords)
-    if np.allclose(surface_verts[0], surface_verts[-1]):
-        surface_verts = surface_verts[:-1]
-    if surface_verts.shape[1] == 2 or overwrite_height:
-        height = np.zeros(surface_verts.shape[0]) + height
-        height = height.reshape(-1, 1)
-        surface_verts = np.hstack((surface_verts, height))
-    footprint_surface.vertices = surface_verts
-    footprint_surface.transform.srs = crs
-    building.add_geometry(footprint_surface, GeometryType.LOD0)
-
-    building.attributes.update(s["properties"])
-    return building
+    """
+    Create buildings from an array of footprint geometries and their properties.
+
+    The geometry operations are done on whole arrays: invalid geometries are
+    fixed with `make_valid`, multipolygons and geometry collections are split
+    into one building per polygon, and the exterior rings are oriented
+    counter-clockwise on a single coordinate buffer from which the vertices of
+    each footprint are sliced.
+
+    Parameters
+    ----------
+    shapes : np.ndarray
+        The shapely geometries of the features.
+    properties : list
+        The properties of the features.
+    uuid_field : str, optional
+        The name of the field containing the UUIDs (default "id").
+    height_field : str, optional
+        The name of the field containing the building heights (default "").
+    crs : str, optional
+        The coordinate reference system of the geometries (default "").
+    overwrite_height : bool, optional
+        Whether to replace Z coordinates by the building height (default False).
+
+    Returns
+    -------
+    list[Building]
+        One building per polygon, in feature order.
+    """
+    shapes = np.asarray(shapes, dtype=object)
+    invalid = ~shapely.is_valid(shapes)
+    if invalid.any():
+        warning(f"Fixing {np.count_nonzero(invalid)} invalid polygons")
+        shapes = shapes.copy()
+        shapes[invalid] = shapely.make_valid(shapes[invalid])
+    parts, feature_index = shapely.get_parts(shapes, return_index=True)
+    # make_valid can nest multipolygons in geometry collections
+    while np.isin(shapely.get_type_id(parts), (4, 5, 6, 7)).any():
+        parts, part_index = shapely.get_parts(parts, return_index=True)
+        feature_index = feature_index[part_index]
+    is_polygon = (shapely.get_type_id(parts) == 3) & ~shapely.is_empty(parts)
+    parts, feature_index = parts[is_polygon], feature_index[is_polygon]
+    if len(parts) == 0:
+        return []
+
+    # Closed exterior rings, stored one after the other in one buffer
+    rings = shapely.get_exterior_ring(parts)
+    coords = shapely.get_coordinates(rings, include_z=True)
+    ring_ends = np.cumsum(shapely.get_num_coordinates(rings))
+    ring_starts = np.concatenate(([0], ring_ends[:-1]))
+
+    # Twice the signed area of each ring (shoelace formula)
+    x, y = coords[:, 0], coords[:, 1]
+    cross = np.zeros(len(coords))
+    cross[:-1] = x[:-1] * y[1:] - x[1:] * y[:-1]
+    cross[ring_ends - 1] = 0.0
+    ccw = np.add.reduceat(cross, ring_starts) >= 0
+
+    # Drop the closing vertex and reverse clockwise rings
+    num_vertices = ring_ends - ring_starts - 1
+    ring = np.repeat(np.arange(len(rings)), num_vertices)
+    vertex_ends = np.cumsum(num_vertices)
+    local = np.arange(vertex_ends[-1]) - np.repeat(
+        vertex_ends - num_vertices, num_vertices
+    )
+    index = np.where(ccw[ring], ring_starts[ring] + local, ring_ends[ring] - 1 - local)
+    vertices = coords[index]
+
+    heights = _parse_heights(properties, height_field)
+    use_height = ~shapely.has_z(parts) | overwrite_height
+    vertices[:, 2] = np.where(
+        use_height[ring], heights[feature_index][ring], vertices[:, 2]
+    )
+
+    buildings = []
+    for surface_verts, i in zip(np.split(vertices, vertex_ends[:-1]), feature_index):
+        building = Building()
+        if uuid_field in properties[i]:
+            building.id = str(properties[i][uuid_field])
+        footprint_surface = Surface()
+        footprint_surface.vertices = surface_verts
+        footprint_surface.transform.srs = crs
+        building.add_geometry(footprint_surface, GeometryType.LOD0)
+        building.attributes.update(properties[i])
+        buildings.append(building)
+    return buildings
 
 
 # def _load_proto_city(filename, *args, **kwargs) -> City:
@@ -98,56 +160,53 @@ def _building_from_fiona(
 #     return city
 
 
-def _load_fiona(
+def _load_vector(
     filename,
     uuid_field="id",
     height_field="",
     area_filter=None,
     bounds=None,
     min_edge_distance=2.0,
+    fields=None,
+    backend=None,
+    skip_features=0,
+    max_features=None,
 ) -> [Building]:
     filename = Path(filename)
     if not filename.is_file():
         raise FileNotFoundError(f"File {filename} not found")
-    buildings = []
-    has_height_field = len(height_field) > 0
+    bbox = None
     bounds_filter = None
     if bounds is not None:
         bounds_filter = shapely.geometry.box(*bounds.tuple).buffer(-min_edge_distance)
-    try:
-        f = fiona.open(filename)
-        f.close()
-    except fiona.errors.DriverError:
-        raise ValueError(f"File {filename} is not a valid file format")
-    with fiona.open(filename) as src:
-        info(f"Reading {len(src)} geometries from {filename}")
-        crs = get_epsg(src.crs)
-        for s in src:
-            building_shape = shapely.geometry.shape(s["geometry"])
-            if area_filter is not None and area_filter > 0:
-                if building_shape.area < area_filter:
-                    continue
-            if bounds_filter is not None:
-                if not bounds_filter.contains(building_shape):
-                    continue
-            geom_type = s["geometry"]["type"]
-            if geom_type == "Polygon":
-                building = _building_from_fiona(s, uuid_field, height_field, crs)
-
-                buildings.append(building)
-            if geom_type == "MultiPolygon":
-                for idx, polygon in enumerate(list(building_shape.geoms)):
-                    # make each polygon its own building
-                    split_geometry = shapely.geometry.mapping(polygon)
-                    split_feature = {
-                        "geometry": split_geometry,
-                        "properties": s["properties"],
-                    }
-                    building = _building_from_fiona(
-                        split_feature, uuid_field, height_field, crs
-                    )
-
-                    buildings.append(building)
+        if bounds_filter.is_empty:
+            info(f"Bounds filter is empty, no buildings loaded from {filename}")
+            return []
+        # Only features whose bounding box intersects the filter are
+        # decoded, using the spatial index of the file if it has one
+        bbox = bounds_filter.bounds
+    columns = None
+    if fields is not None:
+        columns = [f for f in (uuid_field, height_field) if f] + list(fields)
+        columns = list(dict.fromkeys(columns))
+    layer = vector_reader.read_layer(
+        filename,
+        bbox=bbox,
+        columns=columns,
+        skip_features=skip_features,
+        max_features=max_features,
+        backend=backend,
+    )
+    shapes = layer.geometries
+    keep = ~shapely.is_missing(shapes)
+    if area_filter is not None and area_filter > 0:
+        keep &= shapely.area(shapes) >= area_filter
+    if bounds_filter is not None:
+        keep &= shapely.contains(bounds_filter, shapes)
+    index = np.flatnonzero(keep)
+    buildings = _buildings_from_shapes(
+        shapes[index], layer.properties(index), uuid_field, height_field, layer.crs
+    )
 
     info(f"Loaded {len(buildings)} building footprints")
     return buildings
@@ -160,14 +219,23 @@ def load(
     area_filter=None,
     bounds=None,
     min_edge_distance=2.0,
+    fields=None,
+    backend=None,
+    workers=None,
+    glob="*.shp",
 ) -> [Building]:
     """
-    Load the buildings from a supported file and return a `City` object.
+    Load the buildings from a supported file, a directory or a glob pattern.
+
+    Files are loaded in parallel when `workers` is given, and a single GPKG
+    file is then split into feature ranges (unless `bounds` is given, in
+    which case only the features inside the bounds are read). Files whose
+    bounds do not intersect `bounds` are skipped without being read.
 
     Parameters
     ----------
     filename : str
-        The path to the shapefile.
+        The path to the file or directory, or a glob pattern such as "data/*.shp".
     uuid_field : str, optional
         The name of the field containing the UUIDs (default "id").
     height_field : str, optional
@@ -178,25 +246,90 @@ def load(
         The bounding box to filter the buildings (default None).
     min_edge_distance : float, optional
         The minimum distance between a building and the bounding box (default 2.0).
+    fields : list[str], optional
+        The attributes to load, in addition to `uuid_field` and `height_field`
+        which are always loaded (default None, all attributes).
+    backend : str, optional
+        The vector reader to use, "pyogrio" or "fiona" (default None, pyogrio if installed).
+    workers : int, optional
+        The number of processes used to load files or feature ranges (default None, serial).
+    glob : str, optional
+        The glob pattern used to find files in a directory (default "*.shp").
 
     Returns
     -------
-    City
-        A `City` object representing the city loaded from the shapefile.
+    list[Building]
+        The buildings, in sorted file order and then feature order.
     """
+    load_kwargs = {
+        "uuid_field": uuid_field,
+        "height_field": height_field,
+        "area_filter": area_filter,
+        "bounds": bounds,
+        "min_edge_distance": min_edge_distance,
+        "fields": fields,
+        "backend": backend,
+    }
     filename = Path(filename)
+    if filename.is_dir():
+        return _load_files(sorted(filename.glob(glob)), bounds, workers, load_kwargs)
+    if any(c in filename.name for c in "*?["):
+        paths = sorted(filename.parent.glob(filename.name))
+        return _load_files(paths, bounds, workers, load_kwargs)
     if not filename.is_file():
         raise FileNotFoundError(f"File {filename} not found")
-    return generic.load(
-        filename,
-        "city",
-        City,
-        _load_formats,
-        uuid_field=uuid_field,
-        height_field=height_field,
-        area_filter=area_filter,
-        bounds=bounds,
-        min_edge_distance=min_edge_distance,
+    if (
+        workers is not None
+        and workers > 1
+        and bounds is None
+        and filename.suffix == ".gpkg"
+    ):
+        return _load_feature_ranges(filename, workers, load_kwargs)
+    return _load_file(filename, load_kwargs)
+
+
+def _load_file(filename, load_kwargs):
+    return generic.load(filename, "city", City, _load_formats, **load_kwargs)
+
+
+def _load_files(paths, bounds, workers, load_kwargs):
+    if len(paths) == 0:
+        warning("No footprint files found")
+        return []
+    if bounds is not None:
+        selected = [p for p in paths if _bounds_intersect(building_bounds(p), bounds)]
+        if len(selected) < len(paths):
+            skipped = len(paths) - len(selected)
+            info(f"Skipped {skipped} of {len(paths)} files outside bounds")
+        paths = selected
+    return _map_load(paths, [load_kwargs] * len(paths), workers)
+
+
+def _load_feature_ranges(filename, workers, load_kwargs):
+    num_features = vector_reader.count_features(filename)
+    size = max(1, -(-num_features // workers))
+    starts = list(range(0, num_features, size))
+    range_kwargs = [
+        dict(load_kwargs, skip_features=start, max_features=size) for start in starts
+    ]
+    return _map_load([filename] * len(starts), range_kwargs, workers)
+
+
+def _map_load(paths, load_kwargs, workers):
+    if workers is not None and workers > 1 and len(paths) > 1:
+        info(f"Loading footprints from {len(paths)} parts using {workers} processes")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_load_file, paths, load_kwargs))
+    else:
+        parts = map(_load_file, paths, load_kwargs)
+    buildings = [building for part in parts for building in part]
+    info(f"Loaded {len(buildings)} building footprints in total")
+    return buildings
+
+
+def _bounds_intersect(a, b):
+    return (
+        a.xmin <= b.xmax and a.xmax >= b.xmin and a.ymin <= b.ymax and a.ymax >= b.ymin
     )
 
 
@@ -323,10 +456,10 @@ _load_formats = {
     City: {
         ".pb": _load_proto_city,
         ".pb2": _load_proto_city,
-        ".json": _load_fiona,
-        ".shp": _load_fiona,
-        ".geojson": _load_fiona,
-        ".gpkg": _load_fiona,
+        ".json": _load_vector,
+        ".shp": _load_vector,
+        ".geojson": _load_vector,
+        ".gpkg": _load_vector,
     }
 }
 
@@ -1,53 +1,23 @@
-import laspy
 import fiona
 import meshio
 import rasterio
 import numpy as np
 from pathlib import Path
 from types import UnionType
-from dtcc_model import Bounds
 
-
-def las_file_bounds(las_file):
-    """
-    Calculate the bounding box of a LAS file without loading it.
-
-    Args:
-        las_file (str): The path to the LAS file.
-
-    Returns:
-        Bounds: A `Bounds` object representing the bounding box of the LAS file.
-    """
-    src = laspy.read(las_file)
-    bounds = Bounds(
-        src.header.x_min, src.header.y_min, src.header.x_max, src.header.y_max
-    )
-    return bounds
+from .pointcloud import las_file_bounds, las_file_info, csv_file_info
 
 
 def _las_pointcloud_info(path: [str | Path]) -> dict:
-    info = {}
-    info["bounds"] = las_file_bounds(path)
-    src = laspy.read(path)
-    info["crs"] = src.header.parse_crs().name
-    info["x_min"], info["x_max"] = src.header.x_min, src.header.x_max
-    info["y_min"], info["y_max"] = src.header.y_min, src.header.y_max
-    info["z_min"], info["z_max"] = src.header.z_min, src.header.z_max
-    info["count"] = src.header.point_count
-
-    return info
+    return las_file_info(path)
 
 
 def _csv_pointcloud_info(path: [str | Path]) -> dict:
     try:
-        pts = np.loadtxt(path, delimiter=",")
+        info = csv_file_info(path, delimiter=",")
     except ValueError:
         raise ValueError(f"File {path} is not a valid CSV pointcloud file")
-    info = {}
-    info["points"] = pts.shape[0]
-    info["x_min"], info["x_max"] = pts[:, 0].min(), pts[:, 0].max()
-    info["y_min"], info["y_max"] = pts[:, 1].min(), pts[:, 1].max()
-    info["z_min"], info["z_max"] = pts[:, 2].min(), pts[:, 2].max()
+    info["points"] = info["count"]
     return info
 
 
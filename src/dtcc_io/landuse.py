@@ -2,10 +2,11 @@ from dtcc_model.landuse import Landuse, LanduseClasses
 from dtcc_model import proto
 from dtcc_model.geometry.bounds import Bounds
 from pathlib import Path
-import fiona
-import shapely.geometry
+import numpy as np
+import shapely
 from .logging import info, warning, error
 from . import generic
+from . import vector_reader
 from enum import Enum, auto
 
 
@@ -45,11 +46,12 @@ def _load_proto_landuse(filename):
     return landuse
 
 
-def _load_fiona(
+def _load_vector(
     filename,
     landuse_field="DETALJTYP",
     landuse_datasource=LanduseDatasource.LM,
     landuse_mapping_fn=None,
+    backend=None,
     **kwargs,
 ):
     if landuse_mapping_fn is None:
@@ -60,26 +62,21 @@ def _load_fiona(
     filename = Path(filename)
     if not filename.is_file():
         raise FileNotFoundError(f"File {filename} not found")
+    layer = vector_reader.read_layer(filename, backend=backend)
+    # make each polygon of a multipolygon its own land use
+    type_id = shapely.get_type_id(layer.geometries)
+    features = np.flatnonzero((type_id == 3) | (type_id == 6))
+    polygons, part_index = shapely.get_parts(
+        layer.geometries[features], return_index=True
+    )
+    properties = layer.properties(features)
     Landuses = []
-    with fiona.open(filename, "r") as src:
-        for s in src:
-            geom_type = s["geometry"]["type"]
-            if geom_type == "Polygon":
-                landuse = Landuse()
-                landuse.footprint = shapely.geometry.shape(s["geometry"])
-                landuse.landuse = landuse_mapping_fn(s["properties"][landuse_field])
-                landuse.properties = s["properties"]
-                Landuses.append(landuse)
-            if geom_type == "MultiPolygon":
-                for idx, polygon in enumerate(
-                    list(shapely.geometry.shape(s["geometry"]).geoms)
-                ):
-                    # make each polygon its own building
-                    landuse = Landuse()
-                    landuse.footprint = polygon
-                    landuse.landuse = landuse_mapping_fn(s["properties"][landuse_field])
-                    landuse.properties = s["properties"]
-                    Landuses.append(landuse)
+    for polygon, i in zip(polygons, part_index):
+        landuse = Landuse()
+        landuse.footprint = polygon
+        landuse.landuse = landuse_mapping_fn(properties[i][landuse_field])
+        landuse.properties = properties[i]
+        Landuses.append(landuse)
     return Landuses
 
 
@@ -89,6 +86,7 @@ def load(
     landuse_datasource: LanduseDatasource = LanduseDatasource.LM,
     landuse_mapping_fn=None,
     bounds: Bounds = None,
+    backend=None,
 ) -> Landuse:
     """
     Load the land use data from a shapefile and return a `Landuse` object.
@@ -103,6 +101,8 @@ def load(
         The data source of the land use data (default LanduseDatasource.LM).
     landuse_mapping_fn : callable, optional
         A function to map from a land use attibute string to land use types (default None).
+    backend : str, optional
+        The vector reader to use, "pyogrio" or "fiona" (default None, pyogrio if installed).
 
     Returns
     -------
@@ -118,6 +118,7 @@ def load(
         landuse_field="DETALJTYP",
         landuse_datasource=LanduseDatasource.LM,
         landuse_mapping_fn=None,
+        backend=backend,
     )
 
 
@@ -142,10 +143,10 @@ _load_formats = {
     Landuse: {
         ".pb": _load_proto_landuse,
         ".pb2": _load_proto_landuse,
-        ".shp": _load_fiona,
-        ".geojson": _load_fiona,
-        ".json": _load_fiona,
-        ".gpkg": _load_fiona,
+        ".shp": _load_vector,
+        ".geojson": _load_vector,
+        ".json": _load_vector,
+        ".gpkg": _load_vector,
     }
 }
 
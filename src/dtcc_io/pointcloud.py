@@ -1,12 +1,703 @@
+import asyncio
+import copy
+import itertools
+import json
+import queue
+import shutil
+import struct
+import threading
+import warnings
+import zipfile
+from dataclasses import dataclass, replace
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
 from pathlib import Path
 import numpy as np
 import laspy
+import shapely
+from scipy.spatial import cKDTree
+from laspy.copc import CopcReader, Bounds as CopcBounds
+from laspy.point.record import ScaleAwarePointRecord
 
 from dtcc_model import dtcc_pb2 as proto
 from dtcc_model.geometry import PointCloud, Bounds
 from .logging import info, warning, error
 
 from . import generic
+from .tile_catalog import TileCatalog, INDEX_FILENAME
+
+try:
+    import pyarrow
+    import pyarrow.csv
+    import pyarrow.parquet
+
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+POINTCLOUD_FIELDS = ("classification", "intensity", "return_number", "num_returns")
+
+_CSV_SUFFIXES = (".csv", ".txt", ".xyz")
+
+_FIELD_DTYPES = {
+    "classification": np.uint8,
+    "intensity": np.uint16,
+    "return_number": np.uint8,
+    "num_returns": np.uint8,
+}
+
+# A chunked protobuf file is a magic number and a JSON header, a sequence of
+# length-prefixed PointCloud messages, and an index of the blocks followed by
+# the offset of the index and the magic number again.
+_PROTO_BLOCK_MAGIC = b"DTCCPCB1"
+_PROTO_BLOCK_INDEX = struct.Struct("<QQQ6d")
+
+_LAS_DIMENSIONS = {
+    "classification": "classification",
+    "intensity": "intensity",
+    "return_number": "return_number",
+    "num_returns": "number_of_returns",
+}
+
+
+def _splitmix64(h):
+    h = h + np.uint64(0x9E3779B97F4A7C15)
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+@dataclass
+class Decimation:
+    """
+    A decimation applied to the points chunk by chunk while they are read.
+
+    Random sampling hashes the (millimetre-rounded) coordinates of each point
+    together with the seed, so the selection is deterministic and does not
+    depend on how the points are split into chunks or files. Voxel-grid
+    decimation keeps the first point in each voxel of a chunk.
+
+    Attributes:
+        voxel_size (float): The side length of the voxels (default None, no voxel decimation).
+        fraction (float): The fraction of points to keep at random (default None, all).
+        seed (int): The seed of the random sampling (default 0).
+    """
+
+    voxel_size: float = None
+    fraction: float = None
+    seed: int = 0
+
+    def mask(self, points: np.ndarray) -> np.ndarray:
+        """Return a boolean mask of the points to keep."""
+        mask = np.ones(len(points), dtype=bool)
+        if self.fraction is not None:
+            keys = np.round(points * 1000).astype(np.int64).view(np.uint64)
+            h = np.full(len(points), self.seed, dtype=np.uint64)
+            for i in range(keys.shape[1]):
+                h = _splitmix64(h ^ keys[:, i])
+            mask &= (h >> np.uint64(11)) < np.uint64(self.fraction * 2**53)
+        if self.voxel_size is not None:
+            selected = np.flatnonzero(mask)
+            voxels = np.floor(points[selected] / self.voxel_size).astype(np.int64)
+            _, first = np.unique(voxels, axis=0, return_index=True)
+            keep = np.zeros(len(selected), dtype=bool)
+            keep[first] = True
+            mask[selected[~keep]] = False
+        return mask
+
+
+@dataclass
+class PointFilter:
+    """
+    A filter applied to the points chunk by chunk while they are read, so
+    that non-matching points never reach the `PointCloud` arrays.
+
+    Attributes:
+        classification (tuple): The classification codes to keep (default None, all).
+        z_range (tuple): The (min, max) range of Z values to keep (default None, all).
+        return_number (tuple): The return numbers to keep (default None, all).
+        last_return_only (bool): Whether to keep only the last return of each pulse (default False).
+        exclude_withheld (bool): Whether to drop points flagged as withheld (default False).
+        exclude_overlap (bool): Whether to drop overlap points (default False).
+        clip (Polygon): A polygon, multipolygon or sequence of polygons to clip the points to (default None).
+        decimation (Decimation): A decimation applied to the points that pass the filter (default None).
+    """
+
+    classification: tuple = None
+    z_range: tuple = None
+    return_number: tuple = None
+    last_return_only: bool = False
+    exclude_withheld: bool = False
+    exclude_overlap: bool = False
+    clip: object = None
+    decimation: Decimation = None
+
+    def las_mask(self, chunk) -> np.ndarray:
+        """
+        Return a boolean mask of the points in a laspy point record to keep.
+
+        The clip and decimation are not included; they are applied by
+        `refine_mask` to the points that pass all other filters.
+        """
+        dimensions = set(chunk.point_format.dimension_names)
+        mask = np.ones(len(chunk), dtype=bool)
+        if self.classification is not None or (
+            self.exclude_overlap and "overlap" not in dimensions
+        ):
+            classification = np.asarray(chunk["classification"])
+        if self.classification is not None:
+            mask &= np.isin(classification, self.classification)
+        if self.z_range is not None:
+            z = np.asarray(chunk.z)
+            mask &= (z >= self.z_range[0]) & (z <= self.z_range[1])
+        if self.return_number is not None or self.last_return_only:
+            return_number = np.asarray(chunk["return_number"])
+            if self.return_number is not None:
+                mask &= np.isin(return_number, self.return_number)
+            if self.last_return_only:
+                mask &= return_number == np.asarray(chunk["number_of_returns"])
+        if self.exclude_withheld:
+            mask &= ~np.asarray(chunk["withheld"]).astype(bool)
+        if self.exclude_overlap:
+            if "overlap" in dimensions:
+                mask &= ~np.asarray(chunk["overlap"]).astype(bool)
+            else:
+                # Before LAS 1.4 overlap points are marked with class 12
+                mask &= classification != 12
+        return mask
+
+    def mask(self, pc: PointCloud) -> np.ndarray:
+        """Return a boolean mask of the points in a `PointCloud` to keep."""
+        n = len(pc.points)
+        mask = np.ones(n, dtype=bool)
+        if self.z_range is not None:
+            mask &= (pc.points[:, 2] >= self.z_range[0]) & (
+                pc.points[:, 2] <= self.z_range[1]
+            )
+        for field, values in (
+            ("classification", self.classification),
+            ("return_number", self.return_number),
+        ):
+            if values is None:
+                continue
+            if len(getattr(pc, field)) != n:
+                warning(f"Unable to filter on {field}; attribute not loaded")
+                continue
+            mask &= np.isin(getattr(pc, field), values)
+        if self.last_return_only:
+            if len(pc.return_number) != n or len(pc.num_returns) != n:
+                warning("Unable to filter on last return; attributes not loaded")
+            else:
+                mask &= pc.return_number == pc.num_returns
+        if self.exclude_withheld or self.exclude_overlap:
+            warning(
+                "Unable to filter on withheld/overlap flags; attributes not available"
+            )
+        if self.clip is not None or self.decimation is not None:
+            selected = np.flatnonzero(mask)
+            mask[selected[~self.refine_mask(pc.points[selected])]] = False
+        return mask
+
+    def refine_mask(self, points: np.ndarray) -> np.ndarray:
+        """Return a boolean mask of the points to keep after clipping and decimation."""
+        if self.clip is not None:
+            mask = _clip_mask(points, self.clip)
+        else:
+            mask = np.ones(len(points), dtype=bool)
+        if self.decimation is not None:
+            selected = np.flatnonzero(mask)
+            mask[selected[~self.decimation.mask(points[selected])]] = False
+        return mask
+
+
+@dataclass
+class CompactPoints:
+    """
+    A compact storage of the points as float32 offsets from an origin, or as
+    int32 multiples of a scale, instead of float64 world coordinates.
+
+    The origin and scale are stored in the affine of the `PointCloud`
+    transform, and `world_points` converts (slices of) the points back to
+    float64 world coordinates on demand.
+
+    Attributes:
+        dtype (type): np.float32 for offsets or np.int32 for scaled integers (default np.float32).
+        origin (tuple): The (x, y, z) origin (default None, the minimum corner of the data rounded down).
+        scale (float): The resolution of the coordinates stored as integers (default 0.001).
+    """
+
+    dtype: type = np.float32
+    origin: tuple = None
+    scale: float = 0.001
+
+    def __post_init__(self):
+        if np.dtype(self.dtype) not in (np.float32, np.int32):
+            error(f"Unsupported compact point type: {self.dtype}")
+
+    @property
+    def scaled(self):
+        return np.dtype(self.dtype) == np.int32
+
+    @property
+    def affine(self) -> np.ndarray:
+        """The 4x4 affine transform from the stored to world coordinates."""
+        affine = np.eye(4)
+        if self.scaled:
+            affine[:3, :3] *= self.scale
+        affine[:3, 3] = self.origin
+        return affine
+
+    def encode(self, points: np.ndarray) -> np.ndarray:
+        """Convert world coordinates to the compact representation."""
+        local = points - np.asarray(self.origin, dtype=np.float64)
+        if self.scaled:
+            local = np.round(local / self.scale)
+        return local.astype(self.dtype)
+
+
+@dataclass
+class OutlierFilter:
+    """
+    A statistical or radius outlier removal applied while loading.
+
+    Statistical removal drops points whose mean distance to their `neighbors`
+    nearest neighbours exceeds the mean over the tile by more than `std_ratio`
+    standard deviations. Radius removal drops points with fewer than
+    `neighbors` other points within `radius`.
+
+    Directories are processed tile by tile; the neighbourhoods of points near
+    a tile edge include the points of adjacent tiles within `halo` of the
+    tile. Neighbourhoods are computed among the points that pass the other
+    filters.
+
+    Attributes:
+        method (str): The removal method, "statistical" or "radius" (default "statistical").
+        neighbors (int): The number of neighbours used (default 8).
+        std_ratio (float): The standard deviation multiplier of statistical removal (default 2.0).
+        radius (float): The search radius of radius removal (default 1.0).
+        halo (float): The width of the band of neighbouring points read around each tile;
+            at least `radius` is used for radius removal (default 2.0).
+    """
+
+    method: str = "statistical"
+    neighbors: int = 8
+    std_ratio: float = 2.0
+    radius: float = 1.0
+    halo: float = 2.0
+
+    @property
+    def halo_width(self):
+        if self.method == "radius":
+            return max(self.halo, self.radius)
+        return self.halo
+
+    def mask(self, points: np.ndarray, num_core=None) -> np.ndarray:
+        """
+        Return a boolean mask of the points to keep.
+
+        Args:
+            points (np.ndarray): The points, with the points to classify first.
+            num_core (int): The number of leading points to classify; the
+                remaining points are only used as neighbours (default None, all).
+
+        Returns:
+            np.ndarray: A boolean mask of length `num_core`.
+        """
+        if self.method not in ("statistical", "radius"):
+            error(f"Unknown outlier removal method: {self.method}")
+        if num_core is None:
+            num_core = len(points)
+        if num_core == 0 or len(points) < 2:
+            return np.ones(num_core, dtype=bool)
+        tree = cKDTree(points)
+        core = points[:num_core]
+        if self.method == "radius":
+            counts = tree.query_ball_point(core, self.radius, return_length=True)
+            # The point itself is always within the radius
+            return counts - 1 >= self.neighbors
+        k = min(self.neighbors + 1, len(points))
+        distances, _ = tree.query(core, k=k)
+        mean_distances = distances[:, 1:].mean(axis=1)
+        threshold = mean_distances.mean() + self.std_ratio * mean_distances.std()
+        return mean_distances <= threshold
+
+
+class LasWriter:
+    """
+    Write point clouds to a LAS/LAZ file chunk by chunk.
+
+    The point format is chosen from the attributes to be written and the
+    scales and offsets from the bounds, so arbitrarily large outputs can be
+    streamed to disk. Files ending in .laz are compressed.
+
+    Unless given, the point format is chosen from the first chunk written.
+    Streaming callers must pass `point_format` if later chunks may have
+    classifications above 31 or return numbers above 7 (which need format 6).
+    """
+
+    def __init__(
+        self,
+        path,
+        bounds: Bounds = None,
+        fields=POINTCLOUD_FIELDS,
+        point_format=None,
+        scale=0.001,
+        append=False,
+        parallel=False,
+    ):
+        """
+        Open a LAS/LAZ file for writing.
+
+        Args:
+            path (str): The path to the output file.
+            bounds (Bounds): The expected bounds of the points, used to choose offsets (default None, first chunk).
+            fields (tuple): The `PointCloud` attributes to write (default all).
+            point_format (int): The LAS point format (default None, chosen from the first chunk).
+            scale (float): The minimum coordinate resolution (default 0.001).
+            append (bool): Whether to append to an existing file (default False).
+            parallel (bool): Whether to use multi-threaded LAZ compression (default False).
+        """
+        self.path = Path(path)
+        self.bounds = bounds
+        self.fields = tuple(fields)
+        self.point_format = point_format
+        self.scale = scale
+        self.count = 0
+        self._laz_backend = None
+        if self.path.suffix == ".laz":
+            self._laz_backend = (
+                laspy.LazBackend.LazrsParallel if parallel else laspy.LazBackend.Lazrs
+            )
+        self._writer = None
+        self.header = None
+        self._append = append and self.path.exists()
+        if self._append:
+            self._writer = laspy.open(
+                self.path, mode="a", laz_backend=self._laz_backend
+            )
+            self.header = self._writer.header
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _open(self, pointcloud, start, end):
+        if self.point_format is None:
+            self.point_format = _las_point_format(pointcloud, self.fields, start, end)
+        version = "1.4" if self.point_format >= 6 else "1.2"
+        self.header = laspy.LasHeader(point_format=self.point_format, version=version)
+        if self.bounds is not None:
+            mins = np.array([self.bounds.xmin, self.bounds.ymin, self.bounds.zmin])
+            maxs = np.array([self.bounds.xmax, self.bounds.ymax, self.bounds.zmax])
+        elif end <= start:
+            mins = maxs = np.zeros(3)
+        else:
+            points = world_points(pointcloud, start, end)
+            mins, maxs = points.min(axis=0), points.max(axis=0)
+        # Coarsen the scale if needed to fit the extent in 32-bit integers
+        offsets = np.floor(mins)
+        scales = np.maximum(self.scale, (maxs - offsets) / (2**31 - 1))
+        self.header.offsets = offsets
+        self.header.scales = scales
+        self._writer = laspy.open(
+            self.path,
+            mode="w",
+            header=self.header,
+            do_compress=self._laz_backend is not None,
+            laz_backend=self._laz_backend,
+        )
+
+    def write(self, pointcloud: PointCloud, start=0, end=None):
+        """
+        Write the points of a `PointCloud` (or a slice of them) to the file.
+
+        Args:
+            pointcloud (PointCloud): The point cloud to write.
+            start (int): The index of the first point to write (default 0).
+            end (int): The index after the last point to write (default None, all).
+        """
+        if end is None or end > len(pointcloud.points):
+            end = len(pointcloud.points)
+        if end <= start:
+            return
+        if self._writer is None:
+            self._open(pointcloud, start, end)
+        points = laspy.ScaleAwarePointRecord.zeros(end - start, header=self.header)
+        xyz = world_points(pointcloud, start, end)
+        points.x = xyz[:, 0]
+        points.y = xyz[:, 1]
+        points.z = xyz[:, 2]
+        for field in self.fields:
+            values = getattr(pointcloud, field)
+            if len(values) == len(pointcloud.points):
+                points[_LAS_DIMENSIONS[field]] = values[start:end]
+        if self._append:
+            self._writer.append_points(points)
+        else:
+            self._writer.write_points(points)
+        self.count += end - start
+
+    def close(self):
+        if self._writer is None:
+            # Nothing was written; still create a valid empty file
+            self._open(PointCloud(), 0, 0)
+        self._writer.close()
+
+
+def world_points(pointcloud: PointCloud, start=0, end=None) -> np.ndarray:
+    """
+    Return (a slice of) the points of a `PointCloud` in world coordinates.
+
+    Points with a non-identity affine in their transform, such as points
+    loaded with `CompactPoints`, are converted to float64 using the affine;
+    other points are returned as float64.
+
+    Args:
+        pointcloud (PointCloud): The point cloud.
+        start (int): The index of the first point (default 0).
+        end (int): The index after the last point (default None, all).
+
+    Returns:
+        np.ndarray: The float64 world coordinates of the points.
+    """
+    points = pointcloud.points[start:end]
+    affine = _local_affine(pointcloud)
+    if affine is None:
+        return np.asarray(points, dtype=np.float64)
+    return _apply_affine(affine, points)
+
+
+def _local_affine(pc):
+    """Return the affine from the stored to world coordinates, or None if identity."""
+    affine = pc.transform.affine
+    if affine is None or np.array_equal(affine, np.eye(4)):
+        return None
+    return np.asarray(affine)
+
+
+def _apply_affine(affine, points):
+    return points.astype(np.float64) @ affine[:3, :3].T + affine[:3, 3]
+
+
+def _world_pointcloud(pc):
+    """Return a shallow copy of a `PointCloud` with float64 world coordinates."""
+    if _local_affine(pc) is None and pc.points.dtype == np.float64:
+        return pc
+    world = copy.copy(pc)
+    world.points = world_points(pc)
+    world.transform = copy.copy(pc.transform)
+    world.transform.affine = np.eye(4)
+    return world
+
+
+def _with_origin(compact, bounds):
+    if compact is None or compact.origin is not None or bounds is None:
+        return compact
+    origin = np.floor([bounds.xmin, bounds.ymin, bounds.zmin])
+    return replace(compact, origin=tuple(origin))
+
+
+def _compacted(pieces, compact):
+    for piece in pieces:
+        piece.points = compact.encode(world_points(piece))
+        piece.transform.affine = compact.affine
+        yield piece
+
+
+def _compact(pc, compact):
+    """Convert the points of a `PointCloud` to the compact representation."""
+    affine = _local_affine(pc)
+    if (
+        compact.origin is None
+        or pc.points.dtype != np.dtype(compact.dtype)
+        or affine is None
+        or not np.array_equal(affine, compact.affine)
+    ):
+        if len(pc.points) > 0:
+            compact = _with_origin(compact, _world_bounds(pc))
+        elif compact.origin is None:
+            compact = replace(compact, origin=(0.0, 0.0, 0.0))
+        pc.points = compact.encode(world_points(pc))
+    pc.transform.affine = compact.affine
+    if len(pc.points) > 0:
+        pc.bounds = _world_bounds(pc)
+    return pc
+
+
+def _world_bounds(pc):
+    if len(pc.points) == 0:
+        return None
+    mins, maxs = pc.points.min(axis=0), pc.points.max(axis=0)
+    affine = _local_affine(pc)
+    if affine is not None:
+        # The world bounds of the 8 corners of the stored bounds
+        corners = np.array(list(itertools.product(*zip(mins, maxs))))
+        corners = _apply_affine(affine, corners)
+        mins, maxs = corners.min(axis=0), corners.max(axis=0)
+    return Bounds(mins[0], mins[1], maxs[0], maxs[1], zmin=mins[2], zmax=maxs[2])
+
+
+class ProtoBlockWriter:
+    """
+    Write point clouds to a chunked protobuf file block by block.
+
+    Each block of at most `block_size` points is serialized as a separate
+    `PointCloud` message, so no message approaches the 2 GB protobuf limit
+    and only one block is held in memory. The index written on close
+    stores the offset, point count and bounds of each block.
+    """
+
+    def __init__(self, path, fields=POINTCLOUD_FIELDS, block_size=1_000_000):
+        """
+        Create a chunked protobuf file.
+
+        Args:
+            path (str): The path to the file.
+            fields (tuple): The `PointCloud` attributes to write (default all).
+            block_size (int): The maximum number of points per block (default 1 000 000).
+        """
+        self.path = Path(path)
+        self.fields = tuple(fields)
+        self.block_size = block_size
+        self.count = 0
+        self.index = []
+        header = json.dumps({"fields": self.fields}).encode()
+        self._file = open(self.path, "wb")
+        self._file.write(_PROTO_BLOCK_MAGIC)
+        self._file.write(struct.pack("<I", len(header)))
+        self._file.write(header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, pointcloud: PointCloud, start=0, end=None):
+        """
+        Write the points of a `PointCloud` (or a slice of them) to the file.
+
+        Args:
+            pointcloud (PointCloud): The point cloud to write.
+            start (int): The index of the first point to write (default 0).
+            end (int): The index after the last point to write (default None, all).
+        """
+        if end is None or end > len(pointcloud.points):
+            end = len(pointcloud.points)
+        for block_start in range(start, end, self.block_size):
+            block_end = min(block_start + self.block_size, end)
+            self._write_block(pointcloud, block_start, block_end)
+
+    def _write_block(self, pointcloud, start, end):
+        block = PointCloud()
+        block.points = np.ascontiguousarray(world_points(pointcloud, start, end))
+        for field in self.fields:
+            values = getattr(pointcloud, field)
+            if len(values) != len(pointcloud.points):
+                error(f"Unable to write pointcloud; attribute {field} not loaded")
+            setattr(block, field, values[start:end])
+        data = block.to_proto().SerializeToString()
+        offset = self._file.tell()
+        self._file.write(struct.pack("<Q", len(data)))
+        self._file.write(data)
+        mins, maxs = block.points.min(axis=0), block.points.max(axis=0)
+        self.index.append((offset, len(data), end - start, *mins, *maxs))
+        self.count += end - start
+
+    def close(self):
+        if self._file is None:
+            return
+        index_offset = self._file.tell()
+        self._file.write(struct.pack("<Q", len(self.index)))
+        for entry in self.index:
+            self._file.write(_PROTO_BLOCK_INDEX.pack(*entry))
+        self._file.write(struct.pack("<Q", index_offset))
+        self._file.write(_PROTO_BLOCK_MAGIC)
+        self._file.close()
+        self._file = None
+
+
+def proto_block_info(path):
+    """
+    Read the header and block index of a chunked protobuf point cloud file.
+
+    Args:
+        path (str): The path to the file.
+
+    Returns:
+        tuple: The header as a dictionary and a list of dictionaries with the
+        keys `offset`, `size`, `count` and `bounds`, one per block.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(_PROTO_BLOCK_MAGIC)) != _PROTO_BLOCK_MAGIC:
+            error(f"File {path} is not a chunked protobuf point cloud")
+        (header_size,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_size))
+        f.seek(-8 - len(_PROTO_BLOCK_MAGIC), 2)
+        (index_offset,) = struct.unpack("<Q", f.read(8))
+        if f.read(len(_PROTO_BLOCK_MAGIC)) != _PROTO_BLOCK_MAGIC:
+            error(f"File {path} is truncated; the block index is missing")
+        f.seek(index_offset)
+        (num_blocks,) = struct.unpack("<Q", f.read(8))
+        index = []
+        for values in _PROTO_BLOCK_INDEX.iter_unpack(
+            f.read(num_blocks * _PROTO_BLOCK_INDEX.size)
+        ):
+            offset, size, count, xmin, ymin, zmin, xmax, ymax, zmax = values
+            index.append(
+                {
+                    "offset": offset,
+                    "size": size,
+                    "count": count,
+                    "bounds": Bounds(xmin, ymin, xmax, ymax, zmin=zmin, zmax=zmax),
+                }
+            )
+    return header, index
+
+
+def las_file_info(las_file):
+    """
+    Read the header of a LAS/LAZ file without decoding any points.
+
+    Args:
+        las_file (str): The path to the LAS file.
+
+    Returns:
+        dict: A dictionary with the bounds, point count, point format,
+        file version, scales, offsets and CRS of the LAS file.
+    """
+    with laspy.open(las_file) as src:
+        header = src.header
+        try:
+            crs = header.parse_crs()
+        except Exception:
+            warning(f"Unable to parse CRS of {las_file}")
+            crs = None
+        info = {
+            "bounds": Bounds(
+                header.x_min,
+                header.y_min,
+                header.x_max,
+                header.y_max,
+                zmin=header.z_min,
+                zmax=header.z_max,
+            ),
+            "x_min": header.x_min,
+            "x_max": header.x_max,
+            "y_min": header.y_min,
+            "y_max": header.y_max,
+            "z_min": header.z_min,
+            "z_max": header.z_max,
+            "count": header.point_count,
+            "point_format": header.point_format.id,
+            "version": str(header.version),
+            "scales": np.array(header.scales),
+            "offsets": np.array(header.offsets),
+            "crs": crs.name if crs is not None else "",
+        }
+    return info
 
 
 def las_file_bounds(las_file):
@@ -19,13 +710,47 @@ def las_file_bounds(las_file):
     Returns:
         Bounds: A `Bounds` object representing the bounding box of the LAS file.
     """
-    src = laspy.read(las_file)
-    bounds = Bounds(
-        src.header.x_min, src.header.y_min, src.header.x_max, src.header.y_max
-    )
+    with laspy.open(las_file) as src:
+        bounds = Bounds(
+            src.header.x_min, src.header.y_min, src.header.x_max, src.header.y_max
+        )
     return bounds
 
 
+def csv_file_info(csv_file, delimiter=",", skip_header=None):
+    """
+    Calculate the bounds and point count of a CSV file in a single streaming pass.
+
+    Args:
+        csv_file (str): The path to the CSV file.
+        delimiter (str): The delimiter used in the CSV file (default ",").
+        skip_header (int): The number of header lines to skip (default None, auto-detect).
+
+    Returns:
+        dict: A dictionary with the bounds and point count of the CSV file.
+    """
+    count = 0
+    mins = np.full(3, np.inf)
+    maxs = np.full(3, -np.inf)
+    for pts in _iter_csv_arrays(
+        csv_file, 1_000_000, delimiter, skip_header, usecols=(0, 1, 2)
+    ):
+        count += pts.shape[0]
+        mins = np.minimum(mins, pts.min(axis=0))
+        maxs = np.maximum(maxs, pts.max(axis=0))
+    info = {
+        "bounds": Bounds(mins[0], mins[1], maxs[0], maxs[1]),
+        "x_min": mins[0],
+        "x_max": maxs[0],
+        "y_min": mins[1],
+        "y_max": maxs[1],
+        "z_min": mins[2],
+        "z_max": maxs[2],
+        "count": count,
+    }
+    return info
+
+
 def calc_las_bounds(las_path):
     """
     Calculate the bounding box of one or more LAS files.
@@ -42,15 +767,32 @@ def calc_las_bounds(las_path):
     if las_path.is_file():
         bbox = las_file_bounds(las_path)
     if las_path.is_dir():
-        bbox = None
-        for f in las_path.glob("*.la[sz]"):
-            if bbox is None:
-                bbox = las_file_bounds(f)
-            else:
-                bbox.union(las_file_bounds(f))
+        # Header bounds are taken from the tile catalog for unchanged tiles
+        tiles, _, _ = _select_tiles(las_path, "*.la[sz]", None)
+        bbox = _tiles_bounds(tiles)
     return bbox
 
 
+def index_dir(path, glob="*.la[sz]", index_file=None) -> TileCatalog:
+    """
+    Create or update a persistent tile catalog for a directory of LAS/LAZ files.
+
+    The catalog is stored in a sidecar index file and is updated
+    incrementally, so that only new or modified tiles are opened.
+
+    Args:
+        path (str): The path to the directory containing LAS/LAZ files.
+        glob (str): The glob pattern used to find tiles (default "*.la[sz]").
+        index_file (str): The path to the index file (default `<path>/.dtcc_tiles.sqlite`).
+
+    Returns:
+        TileCatalog: The up-to-date tile catalog.
+    """
+    catalog = TileCatalog(path, glob=glob, index_file=index_file)
+    catalog.update()
+    return catalog
+
+
 def bounds_filter_poinst(pts, bounds):
     if bounds is not None:
         valid_pts = (pts[:, 0] >= bounds.xmin) * (pts[:, 0] <= bounds.xmax)  # valid X
@@ -60,12 +802,96 @@ def bounds_filter_poinst(pts, bounds):
     return valid_pts
 
 
+def _as_polygons(clip):
+    if isinstance(clip, shapely.Geometry):
+        return [clip]
+    return list(clip)
+
+
+def clip_indices(points, polygons):
+    """
+    Find the points inside each of a number of polygons.
+
+    The points are sorted by X once, so each polygon only tests the points
+    in its bounding box with a vectorized point-in-polygon test. Points on
+    a polygon boundary are not included.
+
+    Args:
+        points (np.ndarray): The points (or a `PointCloud`) to clip.
+        polygons (list): A polygon, multipolygon or sequence of polygons.
+
+    Returns:
+        list[np.ndarray]: The sorted indices of the points inside each polygon.
+    """
+    if isinstance(points, PointCloud):
+        points = points.points
+    polygons = _as_polygons(polygons)
+    if len(polygons) > 1:
+        order = np.argsort(points[:, 0], kind="stable")
+        x = points[order, 0]
+    indices = []
+    for polygon in polygons:
+        shapely.prepare(polygon)
+        xmin, ymin, xmax, ymax = polygon.bounds
+        if len(polygons) > 1:
+            start = np.searchsorted(x, xmin, side="left")
+            end = np.searchsorted(x, xmax, side="right")
+            candidates = np.sort(order[start:end])
+            y = points[candidates, 1]
+            candidates = candidates[(y >= ymin) & (y <= ymax)]
+        else:
+            candidates = np.flatnonzero(
+                (points[:, 0] >= xmin)
+                & (points[:, 0] <= xmax)
+                & (points[:, 1] >= ymin)
+                & (points[:, 1] <= ymax)
+            )
+        inside = shapely.contains_xy(
+            polygon, points[candidates, 0], points[candidates, 1]
+        )
+        indices.append(candidates[inside])
+    return indices
+
+
+def _clip_mask(points, clip):
+    mask = np.zeros(len(points), dtype=bool)
+    for indices in clip_indices(points, clip):
+        mask[indices] = True
+    return mask
+
+
+def _clip_bounds(point_filter, bounds):
+    if point_filter is None or point_filter.clip is None:
+        return bounds
+    xmin, ymin, xmax, ymax = shapely.total_bounds(_as_polygons(point_filter.clip))
+    if bounds is not None:
+        xmin, ymin = max(xmin, bounds.xmin), max(ymin, bounds.ymin)
+        xmax, ymax = min(xmax, bounds.xmax), min(ymax, bounds.ymax)
+    return Bounds(xmin, ymin, xmax, ymax)
+
+
 def load(
     path,
     points_only=False,
     points_classification_only=False,
     delimiter=",",
     bounds: Bounds = None,
+    workers=None,
+    point_filter: PointFilter = None,
+    mmap=False,
+    resolution=None,
+    level=None,
+    skip_header=None,
+    usecols=None,
+    dtype=np.float64,
+    fields=None,
+    decimate: Decimation = None,
+    clip=None,
+    outliers: OutlierFilter = None,
+    compact: CompactPoints = None,
+    prefetch=0,
+    memory_budget=512 * 2**20,
+    catalog=None,
 ) -> PointCloud:
     """
     Load a LAS/LAZ/CSV file or a directory containing LAS/LAZ/CSV files as a `PointCloud` object.
@@ -76,14 +902,39 @@ def load(
         points_classification_only (bool): Whether to load only the point classification data (default False).
         delimiter (str): The delimiter used in the CSV file (default ",").
         bounds (Bounds): The bounding box to filter the points (default None).
+        workers (int): The number of processes used to load a directory in parallel (default None, serial).
+        point_filter (PointFilter): A filter on classification, Z, returns and flags applied while reading (default None).
+        mmap (bool): Whether to memory-map an uncompressed LAS file instead of reading it (default False).
+        resolution (float): The resolution to load COPC files at (default None, full resolution).
+        level (int | range): The COPC octree level(s) to load (default None, all levels).
+        skip_header (int): The number of header lines to skip in CSV files (default None, auto-detect).
+        usecols (tuple): The CSV columns to read as x, y, z and classification (default None, all).
+        dtype (type): The data type used to parse CSV files (default np.float64).
+        fields (tuple): The `PointCloud` attributes to load; overrides `points_only`
+            and `points_classification_only` (default None).
+        decimate (Decimation): A voxel-grid or random decimation applied while reading (default None).
+        clip (Polygon): Only load points inside a polygon, multipolygon or sequence of polygons (default None).
+        outliers (OutlierFilter): A statistical or radius outlier removal applied while loading (default None).
+        compact (CompactPoints): Store the points as float32 offsets or int32 integers
+            from an origin kept in the transform (default None, float64 world coordinates).
+            With `mmap`, int32 points without an origin and with the scale of the file
+            are a view of the integer coordinates in the mapped file.
+        prefetch (int): The number of files in a directory to read ahead in a background thread (default 0).
+        memory_budget (int): The maximum number of bytes held by files read ahead (default 512 MiB).
+        catalog (TileCatalog | str): A tile catalog of the directory, or the path to its index
+            file; it is only read (default None, `<path>/.dtcc_tiles.sqlite` if it exists).
 
     Returns:
         PointCloud: A `PointCloud` object representing the file(s) loaded.
     """
+    point_filter = _with_filter(point_filter, decimation=decimate, clip=clip)
+    bounds = _clip_bounds(point_filter, bounds)
     path = Path(path)
     if not path.exists():
         raise ValueError(f"Path {path} does not exist")
     if path.is_dir():
+        if mmap:
+            warning("Memory-mapping is only supported when loading a single LAS file")
         return load_dir(
             path,
             points_only=points_only,
@@ -91,8 +942,23 @@ def load(
             delimiter=delimiter,
             glob="*.la[sz]",
             bounds=bounds,
+            workers=workers,
+            point_filter=point_filter,
+            resolution=resolution,
+            level=level,
+            skip_header=skip_header,
+            usecols=usecols,
+            dtype=dtype,
+            fields=fields,
+            outliers=outliers,
+            compact=compact,
+            prefetch=prefetch,
+            memory_budget=memory_budget,
+            catalog=catalog,
         )
     else:
+        if compact is not None and path.suffix in (".las", ".laz"):
+            compact = _las_compact(compact, path, mmap)
         pc = generic.load(
             path,
             "pointcloud",
@@ -102,7 +968,20 @@ def load(
             points_classification_only=points_classification_only,
             delimiter=delimiter,
             bounds=bounds,
+            point_filter=point_filter,
+            mmap=mmap,
+            resolution=resolution,
+            level=level,
+            skip_header=skip_header,
+            usecols=usecols,
+            dtype=dtype,
+            fields=fields,
+            compact=None if outliers is not None else compact,
         )
+        if outliers is not None:
+            pc = _remove_outliers(pc, outliers)
+        if compact is not None:
+            pc = _compact(pc, compact)
         info(f"Loaded {len(pc.points)} points from {path}")
         return pc
 
@@ -114,48 +993,935 @@ def load_dir(
     delimiter=",",
     glob="*.la[sz]",
     bounds=None,
+    workers=None,
+    point_filter: PointFilter = None,
+    resolution=None,
+    level=None,
+    skip_header=None,
+    usecols=None,
+    dtype=np.float64,
+    fields=None,
+    decimate: Decimation = None,
+    clip=None,
+    outliers: OutlierFilter = None,
+    compact: CompactPoints = None,
+    prefetch=0,
+    memory_budget=512 * 2**20,
+    catalog=None,
 ):
-    pc = PointCloud()
-    for f in path.glob(glob):
-        t_pc = load(
-            f,
-            points_only=points_only,
-            points_classification_only=points_classification_only,
-            delimiter=delimiter,
+    """
+    Load all LAS/LAZ/CSV files in a directory as a single `PointCloud` object.
+
+    Args:
+        path (str): The path to the directory.
+        points_only (bool): Whether to load only the point data (default False).
+        points_classification_only (bool): Whether to load only the point classification data (default False).
+        delimiter (str): The delimiter used in CSV files (default ",").
+        glob (str): The glob pattern used to find files (default "*.la[sz]").
+        bounds (Bounds): The bounding box to filter the points (default None).
+        workers (int): The number of processes used to decode files in parallel (default None, serial).
+        point_filter (PointFilter): A filter on classification, Z, returns and flags applied while reading (default None).
+        resolution (float): The resolution to load COPC files at (default None, full resolution).
+        level (int | range): The COPC octree level(s) to load (default None, all levels).
+        skip_header (int): The number of header lines to skip in CSV files (default None, auto-detect).
+        usecols (tuple): The CSV columns to read as x, y, z and classification (default None, all).
+        dtype (type): The data type used to parse CSV files (default np.float64).
+        fields (tuple): The `PointCloud` attributes to load; overrides `points_only`
+            and `points_classification_only` (default None).
+        decimate (Decimation): A voxel-grid or random decimation applied while reading (default None).
+        clip (Polygon): Only load points inside a polygon, multipolygon or sequence of polygons (default None).
+        outliers (OutlierFilter): A statistical or radius outlier removal applied tile by tile (default None).
+        compact (CompactPoints): Store the points as float32 offsets or int32 integers
+            from an origin kept in the transform (default None, float64 world coordinates).
+        prefetch (int): The number of files to read ahead in a background thread while
+            the current file is decoded; ignored when loading in parallel (default 0).
+        memory_budget (int): The maximum number of bytes held by files read ahead (default 512 MiB).
+        catalog (TileCatalog | str): A tile catalog of the directory, or the path to its index
+            file; it is only read (default None, `<path>/.dtcc_tiles.sqlite` if it exists).
+
+    Returns:
+        PointCloud: A `PointCloud` object with the points of all files, in sorted file order.
+    """
+    point_filter = _with_filter(point_filter, decimation=decimate, clip=clip)
+    bounds = _clip_bounds(point_filter, bounds)
+    path = Path(path)
+    select_bounds = bounds
+    if outliers is not None and bounds is not None:
+        # Tiles just outside the bounds provide the halo of the tiles inside
+        select_bounds = _buffered_bounds(bounds, outliers.halo_width)
+    tiles, skipped_tiles, skipped_points = _select_tiles(
+        path, glob, select_bounds, catalog
+    )
+    if skipped_tiles > 0:
+        info(
+            f"Skipped {skipped_tiles} of {len(tiles) + skipped_tiles} tiles "
+            f"({skipped_points} points) outside bounds"
+        )
+    fields = _fields(points_only, points_classification_only, fields)
+    counts = [tile["count"] for tile in tiles]
+    capacity = None if None in counts else sum(counts)
+    paths = [tile["path"] for tile in tiles]
+    load_kwargs = {
+        "points_only": points_only,
+        "points_classification_only": points_classification_only,
+        "delimiter": delimiter,
+        "bounds": bounds,
+        "point_filter": point_filter,
+        "resolution": resolution,
+        "level": level,
+        "skip_header": skip_header,
+        "usecols": usecols,
+        "dtype": dtype,
+        "fields": fields,
+    }
+    if compact is not None:
+        compact = _with_origin(compact, _tiles_bounds(tiles) or bounds)
+        if compact.origin is None:
+            error("Unable to determine the origin of the compact points")
+        load_kwargs["compact"] = compact
+    points_dtype = np.float64 if compact is None else compact.dtype
+    if outliers is not None:
+        load_kwargs["bounds"] = select_bounds
+        pieces = _iter_tiles_without_outliers(
+            tiles, bounds, outliers, load_kwargs, workers
+        )
+        pc = _merge(pieces, fields, capacity, points_dtype)
+    elif workers is not None and workers > 1 and len(paths) > 1:
+        info(f"Loading {len(paths)} files using {workers} processes")
+        tasks = (_load_tile, paths, itertools.repeat(load_kwargs))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pc = _merge(executor.map(*tasks), fields, capacity, points_dtype)
+    else:
+        pieces = _iter_files_chunks(
+            paths,
             bounds=bounds,
+            fields=fields,
+            delimiter=delimiter,
+            point_filter=point_filter,
+            resolution=resolution,
+            level=level,
+            skip_header=skip_header,
+            usecols=usecols,
+            dtype=dtype,
+            prefetch=prefetch,
+            memory_budget=memory_budget,
         )
-        if t_pc is not None:
-            pc.merge(t_pc)
+        if compact is not None:
+            pieces = _compacted(pieces, compact)
+        pc = _merge(pieces, fields, capacity, points_dtype)
+    if compact is not None:
+        pc = _compact(pc, compact)
+    info(f"Loaded {len(pc.points)} points from {len(paths)} files in {path}")
     return pc
 
 
-def _load_csv(path, point_only=False, delimiter=",", bounds=None, **kwargs):
-    pts = np.loadtxt(path, delimiter=delimiter)
-    valid_pts = bounds_filter_poinst(pts, bounds)
-    if len(valid_pts) == 0:
-        warning(f"Pointcloud {path} has no points")
-        return PointCloud()
-    if pts.shape[1] < 3:
-        error(f"Pointcloud {path} has less than 3 dimensions")
+def _load_tile(path, load_kwargs):
+    return load(path, **load_kwargs)
+
+
+def _iter_tiles_without_outliers(tiles, bounds, outliers, load_kwargs, workers=None):
+    """
+    Load tiles and remove the outliers of each tile, in tile order.
+
+    Each tile is decoded once. The halo of a tile is formed by the points of
+    the other tiles within the halo width of its extent, so tiles may also
+    overlap. Points outside `bounds` are only used as halo.
+    """
+    load_kwargs = dict(load_kwargs)
+    compact = load_kwargs.pop("compact", None)
+    width = outliers.halo_width
+    if workers is not None and workers > 1 and len(tiles) > 1:
+        info(f"Loading {len(tiles)} files using {workers} processes")
+    pcs = _map(_load_tile, [(tile["path"], load_kwargs) for tile in tiles], workers)
+    extents = [_points_extent(pc.points) for pc in pcs]
+    mask_args = []
+    for i, (pc, extent) in enumerate(zip(pcs, extents)):
+        halo = [np.empty((0, 3))]
+        if extent is not None:
+            halo_bounds = _buffered_bounds(extent, width)
+            for j, (other, other_extent) in enumerate(zip(pcs, extents)):
+                if j == i or other_extent is None:
+                    continue
+                if _bounds_intersect(other_extent, halo_bounds):
+                    points = other.points
+                    halo.append(points[bounds_filter_poinst(points, halo_bounds)])
+        mask_args.append((outliers, pc.points, np.vstack(halo)))
+    masks = _map(_outlier_mask, mask_args, workers)
+    del mask_args
+    for i, (tile, valid_pts) in enumerate(zip(tiles, masks)):
+        pc, pcs[i] = pcs[i], None
+        removed = len(valid_pts) - np.count_nonzero(valid_pts)
+        info(f"Removed {removed} outliers from {tile['path']}")
+        pc = _apply_mask(pc, valid_pts & bounds_filter_poinst(pc.points, bounds))
+        if compact is not None:
+            pc = _compact(pc, compact)
+        yield pc
+
+
+def _outlier_mask(outliers, points, halo_points):
+    return outliers.mask(np.vstack([points, halo_points]), len(points))
+
+
+def _points_extent(points):
+    if len(points) == 0:
         return None
+    xmin, ymin = points[:, :2].min(axis=0)
+    xmax, ymax = points[:, :2].max(axis=0)
+    return Bounds(xmin, ymin, xmax, ymax)
+
+
+def _buffered_bounds(bounds, width):
+    return Bounds(
+        bounds.xmin - width,
+        bounds.ymin - width,
+        bounds.xmax + width,
+        bounds.ymax + width,
+    )
+
+
+def _apply_mask(pc, valid_pts):
+    fields = _saved_fields(pc)
+    pc.points = pc.points[valid_pts]
+    for field in fields:
+        setattr(pc, field, getattr(pc, field)[valid_pts])
+    return pc
+
+
+def _remove_outliers(pc, outliers):
+    valid_pts = outliers.mask(pc.points)
+    info(f"Removed {len(valid_pts) - np.count_nonzero(valid_pts)} outliers")
+    return _apply_mask(pc, valid_pts)
+
+
+def _tiles_bounds(tiles):
+    tile_bounds = [tile["bounds"] for tile in tiles if tile["bounds"] is not None]
+    if len(tile_bounds) == 0:
+        return None
+    return Bounds(
+        min(b.xmin for b in tile_bounds),
+        min(b.ymin for b in tile_bounds),
+        max(b.xmax for b in tile_bounds),
+        max(b.ymax for b in tile_bounds),
+        zmin=min(b.zmin for b in tile_bounds),
+        zmax=max(b.zmax for b in tile_bounds),
+    )
+
+
+def _bounds_intersect(a, b):
+    return (
+        a.xmin <= b.xmax and a.xmax >= b.xmin and a.ymin <= b.ymax and a.ymax >= b.ymin
+    )
+
+
+def _catalog_entries(path, glob, catalog=None):
+    if catalog is None:
+        if not (path / INDEX_FILENAME).is_file():
+            return {}
+        catalog = path / INDEX_FILENAME
+    if isinstance(catalog, TileCatalog):
+        return {e["path"].name: e for e in catalog.entries()}
+    with TileCatalog(path, glob=glob, index_file=catalog, readonly=True) as c:
+        return {e["path"].name: e for e in c.entries()}
+
+
+def _select_tiles(path, glob, bounds, catalog=None):
+    """
+    Find the files in a directory that may contain points inside bounds.
+
+    LAS/LAZ files are pruned using their header extent, taken from the tile
+    catalog if the directory has been indexed and the file is unchanged since.
+    The catalog is only read, never updated. Other files are always kept.
+
+    Args:
+        path (Path): The directory.
+        glob (str): The glob pattern used to find files.
+        bounds (Bounds): The bounds, or None for all files.
+        catalog (TileCatalog | str): A tile catalog or the path to its index file
+            (default None, `<path>/.dtcc_tiles.sqlite` if it exists).
+
+    Returns:
+        tuple: A list of dictionaries with the keys `path`, `bounds` and `count`
+        (None if unknown), the number of skipped tiles and the number of skipped points.
+    """
+    catalog_entries = _catalog_entries(path, glob, catalog)
+    entries = []
+    for f in sorted(path.glob(glob)):
+        entry = catalog_entries.get(f.name)
+        stat = f.stat() if entry is not None else None
+        if entry is not None and (entry["mtime"], entry["size"]) == (
+            stat.st_mtime,
+            stat.st_size,
+        ):
+            entries.append(
+                {"path": f, "bounds": entry["bounds"], "count": entry["count"]}
+            )
+        elif f.suffix in (".las", ".laz"):
+            las_info = las_file_info(f)
+            entries.append(
+                {"path": f, "bounds": las_info["bounds"], "count": las_info["count"]}
+            )
+        else:
+            entries.append({"path": f, "bounds": None, "count": None})
+    tiles = []
+    skipped_tiles = 0
+    skipped_points = 0
+    for entry in entries:
+        if (
+            bounds is not None
+            and entry["bounds"] is not None
+            and not _bounds_intersect(entry["bounds"], bounds)
+        ):
+            skipped_tiles += 1
+            skipped_points += entry["count"]
+            continue
+        tiles.append(entry)
+    return tiles, skipped_tiles, skipped_points
+
+
+def iter_chunks(
+    path,
+    chunk_size=1_000_000,
+    bounds: Bounds = None,
+    fields=None,
+    delimiter=",",
+    glob="*.la[sz]",
+    point_filter: PointFilter = None,
+    resolution=None,
+    level=None,
+    skip_header=None,
+    usecols=None,
+    dtype=np.float64,
+    decimate: Decimation = None,
+    clip=None,
+    prefetch=0,
+    memory_budget=512 * 2**20,
+    catalog=None,
+):
+    """
+    Iterate over a LAS/LAZ/CSV file or a directory of files in chunks.
+
+    Each chunk is returned as a small `PointCloud` so that point clouds
+    larger than memory can be processed with a constant memory footprint.
+    Files in a directory that lie outside `bounds` are never opened.
+
+    Args:
+        path (str): The path to the LAS/LAZ/CSV file or directory.
+        chunk_size (int): The maximum number of points read per chunk (default 1 000 000).
+        bounds (Bounds): The bounding box to filter the points (default None).
+        fields (tuple): The `PointCloud` attributes to load in addition to the
+            points (default all of "classification", "intensity",
+            "return_number" and "num_returns").
+        delimiter (str): The delimiter used in CSV files (default ",").
+        glob (str): The glob pattern used to find files in a directory (default "*.la[sz]").
+        point_filter (PointFilter): A filter on classification, Z, returns and flags applied to each chunk (default None).
+        resolution (float): The resolution to read COPC files at (default None, full resolution).
+        level (int | range): The COPC octree level(s) to read (default None, all levels).
+        skip_header (int): The number of header lines to skip in CSV files (default None, auto-detect).
+        usecols (tuple): The CSV columns to read as x, y, z and classification (default None, all).
+        dtype (type): The data type used to parse CSV files (default np.float64).
+        decimate (Decimation): A voxel-grid or random decimation applied to each chunk (default None).
+        clip (Polygon): Only yield points inside a polygon, multipolygon or sequence of polygons (default None).
+        prefetch (int): The number of files to read ahead in a background thread (default 0).
+        memory_budget (int): The maximum number of bytes held by files read ahead (default 512 MiB).
+        catalog (TileCatalog | str): A tile catalog of the directory, or the path to its index
+            file; it is only read (default None, `<path>/.dtcc_tiles.sqlite` if it exists).
+
+    Yields:
+        PointCloud: A `PointCloud` object for each non-empty chunk.
+    """
+    point_filter = _with_filter(point_filter, decimation=decimate, clip=clip)
+    bounds = _clip_bounds(point_filter, bounds)
+    path = Path(path)
+    if not path.exists():
+        raise ValueError(f"Path {path} does not exist")
+    if fields is None:
+        fields = POINTCLOUD_FIELDS
+    if path.is_dir():
+        tiles, _, _ = _select_tiles(path, glob, bounds, catalog)
+        files = [tile["path"] for tile in tiles]
+    else:
+        files = [path]
+    yield from _iter_files_chunks(
+        files,
+        chunk_size=chunk_size,
+        bounds=bounds,
+        fields=fields,
+        delimiter=delimiter,
+        point_filter=point_filter,
+        resolution=resolution,
+        level=level,
+        skip_header=skip_header,
+        usecols=usecols,
+        dtype=dtype,
+        prefetch=prefetch,
+        memory_budget=memory_budget,
+    )
+
+
+async def aiter_chunks(path, prefetch=2, **kwargs):
+    """
+    Iterate asynchronously over the chunks of a point cloud file or directory.
+
+    The chunks are read and decoded in a worker thread, so the event loop
+    is not blocked, and the next files are read ahead as in `iter_chunks`.
+
+    Args:
+        path (str): The path to the file or directory.
+        prefetch (int): The number of files to read ahead (default 2).
+        **kwargs: The keyword arguments of `iter_chunks`.
+
+    Yields:
+        PointCloud: A `PointCloud` object for each non-empty chunk.
+    """
+    chunks = iter_chunks(path, prefetch=prefetch, **kwargs)
+    done = object()
+    pending = None
+    try:
+        while True:
+            # Shielded so that cancelling the consumer does not abandon the
+            # worker thread while it is still inside the generator
+            pending = asyncio.ensure_future(asyncio.to_thread(next, chunks, done))
+            pc = await asyncio.shield(pending)
+            pending = None
+            if pc is done:
+                break
+            yield pc
+    finally:
+        if pending is not None:
+            # Let the current chunk finish before closing the generator
+            await asyncio.gather(pending, return_exceptions=True)
+        chunks.close()
+
+
+def _iter_files_chunks(
+    files,
+    chunk_size=1_000_000,
+    bounds=None,
+    fields=POINTCLOUD_FIELDS,
+    delimiter=",",
+    point_filter=None,
+    resolution=None,
+    level=None,
+    skip_header=None,
+    usecols=None,
+    dtype=np.float64,
+    prefetch=0,
+    memory_budget=512 * 2**20,
+):
+    for f, source in _prefetch(files, prefetch, memory_budget):
+        if f.suffix in (".las", ".laz"):
+            chunks = _iter_las_chunks(
+                f,
+                chunk_size,
+                bounds,
+                fields,
+                point_filter,
+                resolution,
+                level,
+                source=source,
+            )
+        elif f.suffix in _CSV_SUFFIXES:
+            chunks = _iter_csv_chunks(
+                f,
+                chunk_size,
+                bounds,
+                fields,
+                delimiter,
+                point_filter,
+                skip_header,
+                usecols,
+                dtype,
+            )
+        elif f.suffix == ".pbc":
+            chunks = _iter_proto_blocks(f, bounds, fields, point_filter)
+        elif f.suffix in _load_formats[PointCloud]:
+            chunks = [
+                _load_formats[PointCloud][f.suffix](
+                    f, fields=fields, bounds=bounds, point_filter=point_filter
+                )
+            ]
+        else:
+            error(f"Unable to iterate over pointcloud; format {f.suffix} not supported")
+        for pc in chunks:
+            if len(pc.points) > 0:
+                yield pc
+
+
+def _prefetch(files, depth, memory_budget):
+    """
+    Yield each file together with its contents, read ahead in a background thread.
+
+    Up to `depth` LAS/LAZ files are read ahead while the current file is
+    decoded, as long as the bytes held stay within `memory_budget` (a file is
+    always read when no other file is held). The contents are yielded as a
+    `BytesIO` and released when the consumer moves on to the next file.
+    COPC files, which are read selectively, and other formats are yielded
+    as None and read from disk by the decoder.
+    """
+    if not depth:
+        for f in files:
+            yield f, None
+        return
+
+    results = queue.Queue(maxsize=depth)
+    held = 0
+    released = threading.Condition()
+    stop = threading.Event()
+
+    def within_budget(size):
+        return stop.is_set() or held == 0 or held + size <= memory_budget
+
+    def read():
+        nonlocal held
+        for f in files:
+            if stop.is_set():
+                return
+            if f.suffix not in (".las", ".laz") or _is_copc(f):
+                results.put((f, None))
+                continue
+            try:
+                size = f.stat().st_size
+                with released:
+                    released.wait_for(lambda: within_budget(size))
+                    if stop.is_set():
+                        return
+                    held += size
+                results.put((f, f.read_bytes()))
+            except Exception as e:
+                results.put((f, e))
+                return
+        results.put(None)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        while (item := results.get()) is not None:
+            f, data = item
+            if isinstance(data, Exception):
+                raise data
+            if data is None:
+                yield f, None
+                continue
+            yield f, BytesIO(data)
+            with released:
+                held -= len(data)
+                released.notify_all()
+    finally:
+        stop.set()
+        with released:
+            released.notify_all()
+        # Unblock the reader if it is waiting for space in the queue
+        while reader.is_alive():
+            try:
+                results.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def _with_filter(point_filter, **kwargs):
+    kwargs = {k: v for k, v in kwargs.items() if v is not None}
+    if not kwargs:
+        return point_filter
+    if point_filter is None:
+        return PointFilter(**kwargs)
+    return replace(point_filter, **kwargs)
+
+
+def _fields(points_only=False, points_classification_only=False, fields=None):
+    if fields is not None:
+        return tuple(fields)
+    if points_only:
+        return ()
+    if points_classification_only:
+        return ("classification",)
+    return POINTCLOUD_FIELDS
+
+
+def _concatenate(chunks, fields):
+    pc = PointCloud()
+    if len(chunks) == 0:
+        return pc
+    pc.transform = chunks[0].transform
+    pc.points = np.concatenate([c.points for c in chunks])
+    for field in fields:
+        setattr(pc, field, np.concatenate([getattr(c, field) for c in chunks]))
+    pc.calculate_bounds()
+    return pc
+
+
+def _merge(pieces, fields, capacity=None, dtype=np.float64):
+    """
+    Merge a sequence of point clouds with a single copy per point.
+
+    If an upper bound on the number of points is known, the arrays are
+    allocated once and each piece is written into its slice. Otherwise
+    the pieces are collected and concatenated once.
+    """
+    if capacity is None:
+        return _concatenate([p for p in pieces if len(p.points) > 0], fields)
+    pc = PointCloud()
+    pc.points = np.empty((capacity, 3), dtype=dtype)
+    for field in fields:
+        setattr(pc, field, np.empty(capacity, dtype=_FIELD_DTYPES[field]))
+    offset = 0
+    for piece in pieces:
+        n = len(piece.points)
+        if n == 0:
+            continue
+        if offset + n > capacity:
+            error(f"Pointcloud has more points than the expected {capacity}")
+        if offset == 0:
+            # Compact pieces share the affine of their origin and scale
+            pc.transform = piece.transform
+        pc.points[offset : offset + n] = piece.points
+        for field in fields:
+            getattr(pc, field)[offset : offset + n] = getattr(piece, field)
+        offset += n
+    if offset == 0:
+        return PointCloud()
+    if offset < capacity:
+        # Shrink in place to avoid a second copy of the arrays
+        pc.points.resize((offset, 3), refcheck=False)
+        for field in fields:
+            getattr(pc, field).resize(offset, refcheck=False)
+    pc.calculate_bounds()
+    return pc
+
+
+def _csv_to_pointcloud(pts, fields, bounds, point_filter=None):
+    valid_pts = bounds_filter_poinst(pts, bounds)
     pc = PointCloud()
     pc.points = pts[:, :3][valid_pts]
-    if not point_only and pts.shape[1] >= 4:
-        pc.classification = pts[:, 3][valid_pts].astype(np.uint8)
+    if "classification" in fields or (
+        point_filter is not None and point_filter.classification is not None
+    ):
+        if pts.shape[1] >= 4:
+            pc.classification = pts[:, 3][valid_pts].astype(np.uint8)
+        else:
+            pc.classification = np.ones(pc.points.shape[0]).astype(np.uint8)
+    if point_filter is not None:
+        valid_pts = point_filter.mask(pc)
+        pc.points = pc.points[valid_pts]
+        if len(pc.classification) == len(valid_pts):
+            pc.classification = pc.classification[valid_pts]
+    return pc
+
+
+def _is_header_line(line, delimiter):
+    try:
+        [float(v) for v in line.split(delimiter) if v.strip()]
+    except ValueError:
+        return True
+    return False
+
+
+def _csv_header_columns(line, delimiter):
+    """Return the columns of x, y, z and classification named in a header row."""
+    names = [v.strip().lower() for v in line.split(delimiter)]
+    if not {"x", "y", "z"}.issubset(names):
+        return None
+    columns = tuple(names.index(name) for name in ("x", "y", "z"))
+    if "classification" in names:
+        columns += (names.index("classification"),)
+    elif len(names) > 3 and names[3] not in POINTCLOUD_FIELDS:
+        # An unnamed fourth column is read as the classification
+        columns += (3,)
+    return columns
+
+
+def _iter_csv_arrays(
+    path, chunk_size, delimiter=",", skip_header=None, usecols=None, dtype=np.float64
+):
+    """
+    Parse a delimited text file in blocks of at most `chunk_size` rows.
+
+    With pyarrow, the file is parsed by its multi-threaded streaming CSV
+    reader and the record batches are copied into the blocks (on 2M rows of
+    4 columns: 0.37 s, against 0.58 s for a single `np.loadtxt` call).
+    Otherwise, and for whitespace-delimited files, each block is parsed by
+    `np.loadtxt` directly from the open file (0.74 s). Only one block of rows
+    is held in memory at a time.
+    """
+    if delimiter is not None and delimiter.isspace():
+        delimiter = None
+    if skip_header is None:
+        with open(path) as src:
+            first = src.readline()
+        skip_header = 1 if first and _is_header_line(first, delimiter) else 0
+        if skip_header and usecols is None:
+            usecols = _csv_header_columns(first, delimiter)
+    if HAS_PYARROW and delimiter is not None:
+        blocks = _iter_csv_arrow(
+            path, chunk_size, delimiter, skip_header, usecols, dtype
+        )
     else:
+        blocks = _iter_csv_loadtxt(
+            path, chunk_size, delimiter, skip_header, usecols, dtype
+        )
+    for pts in blocks:
+        if pts.shape[1] < 3:
+            error(f"Pointcloud {path} has less than 3 dimensions")
+        yield pts
+
+
+def _iter_csv_arrow(path, chunk_size, delimiter, skip_header, usecols, dtype):
+    # Roughly 32 bytes per row, within the limits of the arrow block size
+    block_size = int(np.clip(32 * chunk_size, 1 << 20, 64 << 20))
+    read_options = pyarrow.csv.ReadOptions(
+        skip_rows=skip_header, autogenerate_column_names=True, block_size=block_size
+    )
+    parse_options = pyarrow.csv.ParseOptions(delimiter=delimiter)
+    # Fix the column types so that they are not inferred from the first block
+    column_type = pyarrow.from_numpy_dtype(np.dtype(dtype))
+    columns = range(max(usecols) + 1) if usecols is not None else range(256)
+    convert_options = pyarrow.csv.ConvertOptions(
+        column_types={f"f{i}": column_type for i in columns},
+        include_columns=[f"f{i}" for i in usecols] if usecols is not None else None,
+    )
+    with pyarrow.csv.open_csv(
+        path,
+        read_options=read_options,
+        parse_options=parse_options,
+        convert_options=convert_options,
+    ) as reader:
+        # Copy the columns of the record batches into blocks of chunk_size rows
+        block, filled = None, 0
+        for batch in reader:
+            columns = [c.to_numpy(zero_copy_only=False) for c in batch.columns]
+            start = 0
+            while start < batch.num_rows:
+                if block is None:
+                    block, filled = np.empty((chunk_size, len(columns)), dtype), 0
+                n = min(chunk_size - filled, batch.num_rows - start)
+                for j, column in enumerate(columns):
+                    block[filled : filled + n, j] = column[start : start + n]
+                filled += n
+                start += n
+                if filled == chunk_size:
+                    yield block
+                    block = None
+        if block is not None and filled > 0:
+            yield block[:filled]
+
+
+def _iter_csv_loadtxt(path, chunk_size, delimiter, skip_header, usecols, dtype):
+    with open(path) as src:
+        for _ in range(skip_header):
+            src.readline()
+        while True:
+            with warnings.catch_warnings():
+                # loadtxt warns when there are no rows left
+                warnings.simplefilter("ignore", UserWarning)
+                pts = np.loadtxt(
+                    src,
+                    delimiter=delimiter,
+                    usecols=usecols,
+                    dtype=dtype,
+                    ndmin=2,
+                    max_rows=chunk_size,
+                )
+            if len(pts) == 0:
+                break
+            yield pts
+
+
+def _iter_csv_chunks(
+    path,
+    chunk_size,
+    bounds,
+    fields,
+    delimiter,
+    point_filter=None,
+    skip_header=None,
+    usecols=None,
+    dtype=np.float64,
+):
+    for pts in _iter_csv_arrays(
+        path, chunk_size, delimiter, skip_header, usecols, dtype
+    ):
+        yield _csv_to_pointcloud(pts, fields, bounds, point_filter)
+
+
+def _load_csv(
+    path,
+    point_only=False,
+    delimiter=",",
+    bounds=None,
+    point_filter=None,
+    skip_header=None,
+    usecols=None,
+    dtype=np.float64,
+    chunk_size=1_000_000,
+    **kwargs,
+):
+    fields = _fields(points_classification_only=True)
+    chunks = [
+        pc
+        for pc in _iter_csv_chunks(
+            path,
+            chunk_size,
+            bounds,
+            fields,
+            delimiter,
+            point_filter,
+            skip_header,
+            usecols,
+            dtype,
+        )
+        if len(pc.points) > 0
+    ]
+    if len(chunks) == 0:
+        warning(f"Pointcloud {path} has no points")
+        return PointCloud()
+    pc = _concatenate(chunks, fields)
+    if point_only:
         pc.classification = np.ones(pc.points.shape[0]).astype(np.uint8)
-    pc.calculate_bounds()
     return pc
 
 
-# def load_dir(
-#     las_dir,
-#     points_only=False,
-#     points_classification_only=False,
-#     bounds=None,
-# ):
-#     las_files = list(las_dir.glob("*.la[sz]"))
-#     return load_las(las_files, points_only, points_classification_only, bounds)
+def _las_points(chunk):
+    # Scale the integer X, Y, Z straight into one (n, 3) array
+    points = np.empty((len(chunk), 3))
+    for i, dimension in enumerate("XYZ"):
+        np.multiply(chunk.array[dimension], chunk.scales[i], out=points[:, i])
+        points[:, i] += chunk.offsets[i]
+    return points
+
+
+def _las_chunk_to_pointcloud(chunk, fields, bounds, point_filter=None):
+    points = _las_points(chunk)
+    valid_pts = None
+    if bounds is not None:
+        x, y = points[:, 0], points[:, 1]
+        valid_pts = (x >= bounds.xmin) & (x <= bounds.xmax)
+        valid_pts &= (y >= bounds.ymin) & (y <= bounds.ymax)
+    if point_filter is not None:
+        filter_mask = point_filter.las_mask(chunk)
+        valid_pts = filter_mask if valid_pts is None else valid_pts & filter_mask
+    pc = PointCloud()
+    pc.points = points if valid_pts is None else points[valid_pts]
+    if point_filter is not None and (
+        point_filter.clip is not None or point_filter.decimation is not None
+    ):
+        keep = point_filter.refine_mask(pc.points)
+        pc.points = pc.points[keep]
+        if valid_pts is None:
+            valid_pts = keep
+        else:
+            valid_pts = np.flatnonzero(valid_pts)[keep]
+    for field in fields:
+        values = np.asarray(chunk[_LAS_DIMENSIONS[field]])
+        if valid_pts is not None:
+            values = values[valid_pts]
+        setattr(pc, field, values)
+    return pc
+
+
+def _is_copc(lasfile):
+    return Path(lasfile).name.lower().endswith(".copc.laz")
+
+
+def _iter_copc_chunks(
+    lasfile, chunk_size, bounds, fields, point_filter=None, resolution=None, level=None
+):
+    # Only the octree nodes intersecting the bounds, down to the requested
+    # resolution or level, are decompressed
+    copc_bounds = None
+    if bounds is not None:
+        copc_bounds = CopcBounds(
+            mins=np.array([bounds.xmin, bounds.ymin]),
+            maxs=np.array([bounds.xmax, bounds.ymax]),
+        )
+    with CopcReader.open(lasfile) as src:
+        records = src.query(bounds=copc_bounds, resolution=resolution, level=level)
+    for start in range(0, len(records), chunk_size):
+        yield _las_chunk_to_pointcloud(
+            records[start : start + chunk_size], fields, None, point_filter
+        )
+
+
+def _iter_las_chunks(
+    lasfile,
+    chunk_size,
+    bounds,
+    fields,
+    point_filter=None,
+    resolution=None,
+    level=None,
+    source=None,
+):
+    if _is_copc(lasfile):
+        yield from _iter_copc_chunks(
+            lasfile, chunk_size, bounds, fields, point_filter, resolution, level
+        )
+        return
+    if resolution is not None or level is not None:
+        warning(f"Pointcloud {lasfile} is not a COPC file; loading all levels")
+    with laspy.open(lasfile if source is None else source) as src:
+        for chunk in src.chunk_iterator(chunk_size):
+            yield _las_chunk_to_pointcloud(chunk, fields, bounds, point_filter)
+
+
+def _las_compact(compact, lasfile, mmap=False):
+    file_info = las_file_info(lasfile)
+    if (
+        mmap
+        and compact.scaled
+        and compact.origin is None
+        and np.allclose(file_info["scales"], compact.scale, rtol=1e-9, atol=0)
+    ):
+        # The integer X, Y, Z of the file are the compact points
+        return replace(compact, origin=tuple(file_info["offsets"]))
+    return _with_origin(compact, file_info["bounds"])
+
+
+def _is_las_compact(header, compact):
+    return (
+        compact is not None
+        and compact.scaled
+        and compact.origin is not None
+        and np.allclose(header.scales, compact.scale, rtol=1e-9, atol=0)
+        and np.array_equal(header.offsets, compact.origin)
+    )
+
+
+def _load_las_mmap(lasfile, fields, bounds, point_filter=None, compact=None):
+    with laspy.open(lasfile) as src:
+        header = src.header
+    if header.are_points_compressed:
+        warning(f"Unable to memory-map compressed file {lasfile}; reading it instead")
+        return None
+    records = np.memmap(
+        lasfile,
+        dtype=header.point_format.dtype(),
+        mode="r",
+        offset=header.offset_to_point_data,
+        shape=(header.point_count,),
+    )
+    # Attributes stored as whole fields become read-only views of the mapped
+    # file; bit fields and scaled coordinates are computed on load, unless
+    # the points are kept as the integer coordinates of the file.
+    chunk = ScaleAwarePointRecord(
+        records, header.point_format, header.scales, header.offsets
+    )
+    if bounds is not None or point_filter is not None:
+        return _las_chunk_to_pointcloud(chunk, fields, bounds, point_filter)
+    pc = PointCloud()
+    if _is_las_compact(header, compact):
+        # X, Y and Z are the first three int32 fields of every point format,
+        # so the compact points are a strided view of the mapped file
+        pc.points = np.lib.stride_tricks.as_strided(
+            records["X"],
+            shape=(len(records), 3),
+            strides=(records.itemsize, records.dtype["X"].itemsize),
+            writeable=False,
+        )
+        pc.transform.affine = compact.affine
+    else:
+        pc.points = _las_points(chunk)
+    for field in fields:
+        setattr(pc, field, np.asarray(chunk[_LAS_DIMENSIONS[field]]))
+    return pc
 
 
 def _load_las(
@@ -163,87 +1929,544 @@ def _load_las(
     points_only=False,
     points_classification_only=False,
     bounds=None,
+    point_filter=None,
+    chunk_size=1_000_000,
+    mmap=False,
+    resolution=None,
+    level=None,
+    fields=None,
+    compact=None,
     **kwargs,
 ):
-    use_bounds_filter = bounds is not None
-    las = laspy.read(lasfile)
-    classification = np.array([]).astype(np.uint8)
-    intensity = np.array([]).astype(np.uint16)
-    returnNumber = np.array([]).astype(np.uint8)
-    numberOfReturns = np.array([]).astype(np.uint8)
-    pts = np.array(las.xyz)
-
-    if use_bounds_filter:
-        valid_pts = bounds_filter_poinst(pts, bounds)
-        pts = pts[valid_pts]
-
-    if len(pts) == 0:
+    fields = _fields(points_only, points_classification_only, fields)
+    if mmap:
+        pc = _load_las_mmap(lasfile, fields, bounds, point_filter, compact)
+        if pc is not None:
+            if len(pc.points) == 0:
+                warning(f"Pointcloud {lasfile} has no points")
+                return PointCloud()
+            pc.bounds = _world_bounds(pc)
+            return pc
+    chunks = _iter_las_chunks(
+        lasfile, chunk_size, bounds, fields, point_filter, resolution, level
+    )
+    if compact is not None and compact.origin is not None:
+        # Converted chunk by chunk so the float64 points are never all in memory
+        chunks = _compacted(chunks, compact)
+    chunks = [pc for pc in chunks if len(pc.points) > 0]
+    if len(chunks) == 0:
         warning(f"Pointcloud {lasfile} has no points")
         return PointCloud()
+    return _concatenate(chunks, fields)
+
+
+def _load_proto_pointcloud(
+    path,
+    points_only=False,
+    points_classification_only=False,
+    bounds=None,
+    point_filter=None,
+    fields=None,
+    **kwargs,
+):
+    fields = _fields(points_only, points_classification_only, fields)
+    with open(path, "rb") as f:
+        pc = PointCloud()
+        pc.from_proto(f.read())
+    for field in POINTCLOUD_FIELDS:
+        if field not in fields:
+            setattr(pc, field, np.empty(0, dtype=_FIELD_DTYPES[field]))
+    loaded = [f for f in fields if len(getattr(pc, f)) == len(pc.points)]
+    if bounds is not None or point_filter is not None:
+        pc = _select_points(pc, loaded, bounds, point_filter)
+        pc.calculate_bounds()
+    return pc
+
+
+def _iter_proto_blocks(path, bounds, fields, point_filter=None, index=None):
+    if index is None:
+        _, index = proto_block_info(path)
+    with open(path, "rb") as f:
+        for entry in index:
+            if bounds is not None and not _bounds_intersect(entry["bounds"], bounds):
+                continue
+            f.seek(entry["offset"] + 8)
+            pc = PointCloud()
+            pc.from_proto(f.read(entry["size"]))
+            for field in POINTCLOUD_FIELDS:
+                if field not in fields:
+                    setattr(pc, field, np.empty(0, dtype=_FIELD_DTYPES[field]))
+            loaded = [f for f in fields if len(getattr(pc, f)) == len(pc.points)]
+            yield _select_points(pc, loaded, bounds, point_filter)
+
+
+def _load_proto_blocks(
+    path,
+    points_only=False,
+    points_classification_only=False,
+    bounds=None,
+    point_filter=None,
+    fields=None,
+    **kwargs,
+):
+    fields = _fields(points_only, points_classification_only, fields)
+    header, index = proto_block_info(path)
+    fields = tuple(f for f in fields if f in header["fields"])
+    if bounds is not None:
+        index = [e for e in index if _bounds_intersect(e["bounds"], bounds)]
+    capacity = sum(e["count"] for e in index)
+    blocks = _iter_proto_blocks(path, bounds, fields, point_filter, index)
+    return _merge(blocks, fields, capacity)
+
 
-    if not points_only:
-        classification = np.array(las.classification)
-        if use_bounds_filter:
-            classification = classification[valid_pts]
-    if not (points_only or points_classification_only):
-        intensity = np.array(las.intensity)
-        returnNumber = np.array(las.return_num)
-        numberOfReturns = np.array(las.num_returns)
-        if use_bounds_filter:
-            intensity = intensity[valid_pts]
-            returnNumber = returnNumber[valid_pts]
-            numberOfReturns = numberOfReturns[valid_pts]
+def _select_points(pc, fields, bounds=None, point_filter=None):
+    masks = []
+    if bounds is not None:
+        masks.append(lambda: bounds_filter_poinst(pc.points, bounds))
+    if point_filter is not None:
+        masks.append(lambda: point_filter.mask(pc))
+    for mask in masks:
+        valid_pts = mask()
+        pc.points = pc.points[valid_pts]
+        for field in fields:
+            setattr(pc, field, getattr(pc, field)[valid_pts])
+    return pc
+
+
+def _mmap_npz(path):
+    """Memory-map the arrays of an uncompressed .npz file."""
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as raw:
+        for zinfo in zf.infolist():
+            if zinfo.compress_type != zipfile.ZIP_STORED:
+                return None
+            with zf.open(zinfo) as member:
+                version = np.lib.format.read_magic(member)
+                if version == (1, 0):
+                    header = np.lib.format.read_array_header_1_0(member)
+                else:
+                    header = np.lib.format.read_array_header_2_0(member)
+                header_size = member.tell()
+            shape, fortran_order, dtype = header
+            raw.seek(zinfo.header_offset + 26)
+            name_size, extra_size = struct.unpack("<HH", raw.read(4))
+            offset = zinfo.header_offset + 30 + name_size + extra_size + header_size
+            arrays[Path(zinfo.filename).stem] = np.memmap(
+                path,
+                dtype=dtype,
+                mode="r",
+                offset=offset,
+                shape=shape,
+                order="F" if fortran_order else "C",
+            )
+    return arrays
+
+
+def _load_npz(
+    path,
+    points_only=False,
+    points_classification_only=False,
+    bounds=None,
+    point_filter=None,
+    mmap=False,
+    fields=None,
+    **kwargs,
+):
+    fields = _fields(points_only, points_classification_only, fields)
+    arrays = _mmap_npz(path) if mmap else None
+    if arrays is None:
+        arrays = np.load(path)
     pc = PointCloud()
-    pc.points = pts
-    if not points_only:
-        pc.classification = classification
-    if not (points_only or points_classification_only):
-        pc.intensity = intensity
-        pc.return_number = returnNumber
-        pc.num_returns = numberOfReturns
+    pc.points = arrays["points"]
+    fields = tuple(f for f in fields if f in arrays)
+    for field in fields:
+        setattr(pc, field, arrays[field])
+    pc = _select_points(pc, fields, bounds, point_filter)
     pc.calculate_bounds()
     return pc
 
 
-def _load_proto_pointcloud(path, **kwargs):
-    with open(path, "rb") as f:
-        pc = PointCloud()
-        pc.from_proto(f.read())
+def _load_parquet(
+    path,
+    points_only=False,
+    points_classification_only=False,
+    bounds=None,
+    point_filter=None,
+    fields=None,
+    **kwargs,
+):
+    fields = _fields(points_only, points_classification_only, fields)
+    schema = pyarrow.parquet.read_schema(path)
+    fields = tuple(f for f in fields if f in schema.names)
+    filters = None
+    if bounds is not None:
+        # Row groups entirely outside the bounds are skipped using their statistics
+        filters = [
+            ("x", ">=", bounds.xmin),
+            ("x", "<=", bounds.xmax),
+            ("y", ">=", bounds.ymin),
+            ("y", "<=", bounds.ymax),
+        ]
+    table = pyarrow.parquet.read_table(
+        path, columns=["x", "y", "z", *fields], filters=filters
+    )
+    pc = PointCloud()
+    pc.points = np.column_stack([table.column(c).to_numpy() for c in ("x", "y", "z")])
+    for field in fields:
+        setattr(pc, field, table.column(field).to_numpy())
+    pc = _select_points(pc, fields, None, point_filter)
+    pc.calculate_bounds()
     return pc
 
 
-def save(pointcloud, outfile):
-    generic.save(pointcloud, outfile, "pointcloud", _save_formats)
+def save(pointcloud, outfile, **kwargs):
+    generic.save(pointcloud, outfile, "pointcloud", _save_formats, **kwargs)
+
+
+def _format_csv_column(values, precision):
+    """
+    Format a column of numbers as fixed-point text without a per-value loop.
+
+    Returns a matrix of characters and a mask of the characters in use.
+    Selecting the used characters row by row gives the text of each value.
+    """
+    n = len(values)
+    scaled = np.round(values * 10.0**precision).astype(np.int64)
+    negative = scaled < 0
+    scaled = np.abs(scaled)
+    width = max(len(str(scaled.max())) if n > 0 else 1, precision + 1)
+    num_digits = np.ones(n, dtype=np.int64)
+    for k in range(1, width):
+        num_digits += scaled >= 10**k
+    num_digits = np.maximum(num_digits, precision + 1)
+    digits = np.empty((n, width), dtype=np.uint8)
+    used = np.empty((n, width), dtype=bool)
+    for k in range(width):
+        power = width - 1 - k
+        digits[:, k] = ord("0") + (scaled // 10**power) % 10
+        used[:, k] = power < num_digits
+    chars = [np.full((n, 1), ord("-"), dtype=np.uint8), digits]
+    masks = [negative[:, None], used]
+    if precision > 0:
+        chars[1:] = [
+            digits[:, :-precision],
+            np.full((n, 1), ord("."), dtype=np.uint8),
+            digits[:, -precision:],
+        ]
+        masks[1:] = [
+            used[:, :-precision],
+            np.ones((n, 1), dtype=bool),
+            used[:, -precision:],
+        ]
+    return chars, masks
+
+
+def _format_csv_block(columns, precisions, delimiter=","):
+    n = len(columns[0])
+    chars, masks = [], []
+    for i, (values, precision) in enumerate(zip(columns, precisions)):
+        column_chars, column_masks = _format_csv_column(values, precision)
+        chars += column_chars
+        masks += column_masks
+        separator = delimiter if i < len(columns) - 1 else "\n"
+        chars.append(np.full((n, 1), ord(separator), dtype=np.uint8))
+        masks.append(np.ones((n, 1), dtype=bool))
+    return np.hstack(chars)[np.hstack(masks)].tobytes()
+
+
+def _save_csv(pointcloud, outfile, precision=3, delimiter=",", chunk_size=1_000_000):
+    fields = _saved_fields(pointcloud)
+    precisions = [precision] * 3 + [0] * len(fields)
+    with open(outfile, "wb") as dst:
+        # The header names the columns, as the saved attributes may vary
+        header = delimiter.join(["x", "y", "z"] + list(fields))
+        dst.write(f"{header}\n".encode())
+        for start in range(0, len(pointcloud.points), chunk_size):
+            end = start + chunk_size
+            points = world_points(pointcloud, start, end)
+            columns = [points[:, i].astype(np.float64) for i in range(3)]
+            columns += [
+                getattr(pointcloud, f)[start:end].astype(np.float64) for f in fields
+            ]
+            if not all(np.isfinite(c).all() for c in columns[:3]):
+                np.savetxt(
+                    dst,
+                    np.column_stack(columns),
+                    delimiter=delimiter,
+                    fmt=[f"%.{p}f" for p in precisions],
+                )
+                continue
+            dst.write(_format_csv_block(columns, precisions, delimiter))
+
+
+def _las_point_format(pointcloud, fields, start=0, end=None):
+    # Format 6 is needed for classifications above 31 or returns above 7
+    point_format = 0
+    if "classification" in fields and len(pointcloud.classification):
+        if pointcloud.classification[start:end].max() > 31:
+            point_format = 6
+    for field in ("return_number", "num_returns"):
+        if field in fields and len(getattr(pointcloud, field)):
+            if getattr(pointcloud, field)[start:end].max() > 7:
+                point_format = 6
+    return point_format
 
 
-def _save_csv(pointcloud, outfile):
-    pts = np.array([[p.x, p.y, p.z] for p in pointcloud.points])
-    np.savetxt(outfile, pts, delimiter=",")
+def _save_las(pointcloud, las_file, chunk_size=1_000_000, parallel=False):
+    bounds = _world_bounds(pointcloud)
+    fields = _saved_fields(pointcloud)
+    point_format = _las_point_format(pointcloud, fields)
+    with LasWriter(
+        las_file,
+        bounds=bounds,
+        fields=fields,
+        point_format=point_format,
+        parallel=parallel,
+    ) as writer:
+        for start in range(0, len(pointcloud.points), chunk_size):
+            writer.write(pointcloud, start, start + chunk_size)
 
 
-def _save_las(pointcloud, las_file):
-    # hdr = laspy.header
-    # las = laspy.create(point_format=2, file_version="1.2")
+def _saved_fields(pointcloud):
+    n = len(pointcloud.points)
+    return [f for f in POINTCLOUD_FIELDS if len(getattr(pointcloud, f)) == n]
 
-    outfile = laspy.create(point_format=2, file_version="1.2")
-    # outfile = laspy.file.File(las_file, mode="w")
-    # outfile.header.point_format_id = 2
-    outfile.x = pointcloud.points[:, 0]
-    outfile.y = pointcloud.points[:, 1]
-    outfile.z = pointcloud.points[:, 2]
-    if len(pointcloud.classification) == len(pointcloud.points):
-        outfile.classification = pointcloud.classification
-    outfile.write(las_file)
+
+def _save_npz(pointcloud, outfile):
+    # Stored uncompressed so that the arrays can be memory-mapped on load
+    arrays = {f: getattr(pointcloud, f) for f in _saved_fields(pointcloud)}
+    np.savez(outfile, points=world_points(pointcloud), **arrays)
+
+
+def _save_parquet(pointcloud, outfile, compression="zstd"):
+    points = world_points(pointcloud)
+    columns = {"x": points[:, 0], "y": points[:, 1], "z": points[:, 2]}
+    for f in _saved_fields(pointcloud):
+        columns[f] = getattr(pointcloud, f)
+    pyarrow.parquet.write_table(
+        pyarrow.table(columns), outfile, compression=compression
+    )
 
 
 def _save_proto_pointcloud(pointcloud, outfile):
     outfile = Path(outfile)
+    pointcloud = _world_pointcloud(pointcloud)
     outfile.write_bytes(pointcloud.to_proto().SerializeToString())
 
 
+def _save_proto_blocks(pointcloud, outfile, block_size=1_000_000):
+    fields = _saved_fields(pointcloud)
+    with ProtoBlockWriter(outfile, fields=fields, block_size=block_size) as writer:
+        writer.write(pointcloud)
+
+
 def _save_json_pointcloud(pointcloud, outfile):
     outfile = Path(outfile)
-    outfile.write_text(pointcloud.to_json())
+    outfile.write_text(_world_pointcloud(pointcloud).to_json())
+
+
+def retile(
+    src_dir,
+    dst_dir,
+    tile_size,
+    buffer=0.0,
+    glob="*.la[sz]",
+    suffix=".laz",
+    chunk_size=1_000_000,
+    max_buffered_points=10_000_000,
+    workers=None,
+) -> TileCatalog:
+    """
+    Split and merge the point cloud files in a directory into a regular tile grid.
+
+    Points are streamed from the input LAS/LAZ files in chunks and routed to
+    the grid cells they fall in. At most `max_buffered_points` points are held
+    in memory per input file before they are flushed to disk. Input files, and
+    then output tiles, are processed in parallel when `workers` is given.
+
+    The points are copied record by record, so all their dimensions (GPS
+    time, RGB, extra bytes, ...) are kept. The tiles get the point format,
+    version and VLRs (including the CRS) of the first input file; dimensions
+    of other input files that this point format lacks are dropped.
+
+    Args:
+        src_dir (str): The directory containing the input LAS/LAZ files.
+        dst_dir (str): The directory to write the tiles to.
+        tile_size (float): The side length of the tiles; tiles are aligned to multiples of it.
+        buffer (float): The distance by which tiles overlap their neighbours (default 0).
+        glob (str): The glob pattern used to find input files (default "*.la[sz]").
+        suffix (str): The suffix of the output tiles, ".las" or ".laz" (default ".laz").
+        chunk_size (int): The number of points read per chunk (default 1 000 000).
+        max_buffered_points (int): The number of points buffered per input file before flushing (default 10 000 000).
+        workers (int): The number of processes to use (default None, serial).
+
+    Returns:
+        TileCatalog: The tile catalog of the output directory.
+    """
+    src_dir = Path(src_dir)
+    dst_dir = Path(dst_dir)
+    if not src_dir.is_dir():
+        raise ValueError(f"Path {src_dir} is not a directory")
+    if buffer >= tile_size:
+        raise ValueError("The tile buffer must be smaller than the tile size")
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    # Parts left behind by an interrupted run would otherwise be appended to
+    part_dir = dst_dir / ".parts"
+    if part_dir.exists():
+        shutil.rmtree(part_dir)
+    part_dir.mkdir()
+    src_files = sorted(src_dir.glob(glob))
+    if len(src_files) == 0:
+        part_dir.rmdir()
+        warning(f"No files matching {glob} found in {src_dir}")
+        return index_dir(dst_dir, glob=f"*{suffix}")
+    info(f"Retiling {len(src_files)} files into {tile_size} x {tile_size} tiles")
+    split_args = [
+        (f, part_dir, i, tile_size, buffer, chunk_size, max_buffered_points)
+        for i, f in enumerate(src_files)
+    ]
+    tiles = set()
+    for file_tiles in _map(_split_file, split_args, workers):
+        tiles.update(file_tiles)
+    merge_args = [
+        (tile, part_dir, dst_dir, tile_size, buffer, suffix, src_files[0])
+        for tile in tiles
+    ]
+    list(_map(_merge_tile, sorted(merge_args), workers))
+    part_dir.rmdir()
+    info(f"Wrote {len(tiles)} tiles to {dst_dir}")
+    return index_dir(dst_dir, glob=f"*{suffix}")
+
+
+def _map(function, args, workers=None):
+    if workers is not None and workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(function, *zip(*args)))
+    return [function(*a) for a in args]
+
+
+def _tile_keys(points, tile_size, buffer):
+    """Return (point index, ix, iy) for each tile a point falls in, including buffers."""
+    lo = np.floor((points[:, :2] - buffer) / tile_size).astype(np.int64)
+    hi = np.floor((points[:, :2] + buffer) / tile_size).astype(np.int64)
+    indices, keys = [], []
+    for dx in (0, 1):
+        for dy in (0, 1):
+            mask = (lo[:, 0] + dx <= hi[:, 0]) & (lo[:, 1] + dy <= hi[:, 1])
+            indices.append(np.nonzero(mask)[0])
+            keys.append(lo[mask] + (dx, dy))
+    return np.concatenate(indices), np.concatenate(keys)
+
+
+def _split_file(
+    src_file, part_dir, file_index, tile_size, buffer, chunk_size, max_buffered_points
+):
+    buffered = {}
+    num_buffered = 0
+    tiles = set()
+
+    with laspy.open(src_file) as reader:
+        header = reader.header
+
+        def flush():
+            # Parts keep the header (and so the records) of the input file
+            for (ix, iy), pieces in buffered.items():
+                part_file = part_dir / f"{ix}_{iy}_{file_index}.las"
+                append = part_file.exists()
+                if append:
+                    writer = laspy.open(part_file, mode="a")
+                else:
+                    writer = laspy.open(
+                        part_file, mode="w", header=copy.deepcopy(header)
+                    )
+                with writer:
+                    for piece in pieces:
+                        if append:
+                            writer.append_points(piece)
+                        else:
+                            writer.write_points(piece)
+            buffered.clear()
+
+        for records in reader.chunk_iterator(chunk_size):
+            points = np.column_stack((records.x, records.y))
+            indices, keys = _tile_keys(points, tile_size, buffer)
+            order = np.lexsort((keys[:, 1], keys[:, 0]))
+            indices, keys = indices[order], keys[order]
+            starts = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+            for group in np.split(np.arange(len(indices)), starts):
+                if len(group) == 0:
+                    continue
+                tile = tuple(int(k) for k in keys[group[0]])
+                buffered.setdefault(tile, []).append(records[indices[group]])
+                tiles.add(tile)
+                num_buffered += len(group)
+            if num_buffered >= max_buffered_points:
+                flush()
+                num_buffered = 0
+        flush()
+    return tiles
+
+
+def _tile_header(template_file, bounds):
+    with laspy.open(template_file) as reader:
+        template = reader.header
+    header = laspy.LasHeader(
+        point_format=copy.deepcopy(template.point_format), version=template.version
+    )
+    header.global_encoding = copy.deepcopy(template.global_encoding)
+    header.vlrs = [
+        v for v in template.vlrs if not isinstance(v, laspy.vlrs.known.ExtraBytesVlr)
+    ]
+    # Keep the resolution and Z offset of the input, with X/Y offsets at the
+    # tile, coarsening the X/Y scales if needed to fit the tile in 32 bits
+    offsets = np.array(
+        [np.floor(bounds.xmin), np.floor(bounds.ymin), template.offsets[2]]
+    )
+    maxs = np.array([bounds.xmax, bounds.ymax, offsets[2]])
+    header.offsets = offsets
+    header.scales = np.maximum(template.scales, (maxs - offsets) / (2**31 - 1))
+    return header
+
+
+def _convert_records(records, header):
+    """Copy records to the point format, scales and offsets of a header."""
+    converted = ScaleAwarePointRecord.zeros(len(records), header=header)
+    dimensions = set(records.point_format.dimension_names)
+    for name in header.point_format.dimension_names:
+        if name not in ("X", "Y", "Z") and name in dimensions:
+            converted[name] = records[name]
+    converted.x = records.x
+    converted.y = records.y
+    converted.z = records.z
+    return converted
+
+
+def _merge_tile(tile, part_dir, dst_dir, tile_size, buffer, suffix, template_file):
+    ix, iy = tile
+    x0, y0 = ix * tile_size, iy * tile_size
+    bounds = Bounds(
+        x0 - buffer, y0 - buffer, x0 + tile_size + buffer, y0 + tile_size + buffer
+    )
+    part_files = sorted(
+        part_dir.glob(f"{ix}_{iy}_*.las"), key=lambda f: int(f.stem.split("_")[-1])
+    )
+    tile_file = (
+        dst_dir / f"tile_{_format_coordinate(x0)}_{_format_coordinate(y0)}{suffix}"
+    )
+    header = _tile_header(template_file, bounds)
+    with laspy.open(
+        tile_file, mode="w", header=header, do_compress=suffix == ".laz"
+    ) as writer:
+        for part_file in part_files:
+            with laspy.open(part_file) as reader:
+                for records in reader.chunk_iterator(1_000_000):
+                    writer.write_points(_convert_records(records, header))
+            part_file.unlink()
+    return tile_file
+
+
+def _format_coordinate(x):
+    return str(int(x)) if float(x).is_integer() else str(x)
 
 
 def list_io():
@@ -258,9 +2481,13 @@ _load_formats = {
     PointCloud: {
         ".pb": _load_proto_pointcloud,
         ".pb2": _load_proto_pointcloud,
+        ".pbc": _load_proto_blocks,
         ".las": _load_las,
         ".laz": _load_las,
         ".csv": _load_csv,
+        ".txt": _load_csv,
+        ".xyz": _load_csv,
+        ".npz": _load_npz,
     }
 }
 
@@ -268,9 +2495,15 @@ _save_formats = {
     PointCloud: {
         ".pb": _save_proto_pointcloud,
         ".pb2": _save_proto_pointcloud,
+        ".pbc": _save_proto_blocks,
         ".json": _save_json_pointcloud,
         ".las": _save_las,
         ".laz": _save_las,
         ".csv": _save_csv,
+        ".npz": _save_npz,
     }
 }
+
+if HAS_PYARROW:
+    _load_formats[PointCloud].update({".parquet": _load_parquet})
+    _save_formats[PointCloud].update({".parquet": _save_parquet})
@@ -2,6 +2,7 @@
 # Licensed under the MIT License
 
 from pathlib import Path
+import shapely
 import shapely.geometry
 import shapely.ops
 import shapely.affinity
@@ -13,7 +14,7 @@ import pyproj
 from dtcc_model.roadnetwork import RoadNetwork, RoadType, Road
 from dtcc_model.geometry import Georef
 from . import generic
-from .utils import get_epsg
+from . import vector_reader
 from .logging import info, warning, error
 
 from enum import Enum, auto
@@ -124,13 +125,14 @@ def _load_proto_roadnetwork(filename):
     return road_network
 
 
-def _load_fiona(
+def _load_vector(
     filename,
     type_field="KATEGORI",
     name_field="NAMN",
     road_datasource: Union[RoadDatasource, str] = RoadDatasource.LM,
     road_attribute_mapping_fn: Callable[[str], Tuple[RoadType, bool, bool]] = None,
     simplify: float = 0,
+    backend=None,
     **kwargs,
 ):
     filename = Path(filename)
@@ -149,38 +151,38 @@ def _load_fiona(
 
     vertex_map = {}
 
-    with fiona.open(filename, "r") as src:
-        crs = get_epsg(src.crs)
-        for s in src:
-            if s["geometry"]["type"] != "LineString":
-                continue
-            road_type, tunnel, bridge = road_attribute_mapping_fn(
-                s["properties"][type_field]
-            )
-            if road_type is None:
-                warning(
-                    f'Unknown road type: {s["properties"][type_field]}, using default'
-                )
-                road_type = RoadType.PRIMARY
-            road_geometry = shapely.geometry.shape(s["geometry"])
-            if simplify > 0:
-                road_geometry = road_geometry.simplify(simplify, preserve_topology=True)
-            road = Road()
-            road.road_geometry = road_geometry
-            road.road_type = road_type
-            road.tunnel = tunnel
-            road.bridge = bridge
-            road.road_name = s["properties"].get(name_field, "")
-
-            for v in road.road_geometry.coords:
-                v = (round(v[0], 3), round(v[1], 3))
-                if v not in vertex_map:
-                    vertex_map[v] = len(vertex_map)
-                road.road_vertices.append(vertex_map[v])
-            roads.append(road)
-        road_network.roads = roads
-        road_network.georef = Georef(crs=str(crs))
-        road_network.vertices = np.array([[v[0], v[1]] for v in vertex_map.keys()])
+    layer = vector_reader.read_layer(filename, backend=backend)
+    lines = np.flatnonzero(shapely.get_type_id(layer.geometries) == 1)
+    road_types = layer.columns[type_field][lines].tolist()
+    if name_field in layer.columns:
+        road_names = layer.columns[name_field][lines].tolist()
+    else:
+        road_names = [""] * len(lines)
+    for road_geometry, category, road_name in zip(
+        layer.geometries[lines], road_types, road_names
+    ):
+        road_type, tunnel, bridge = road_attribute_mapping_fn(category)
+        if road_type is None:
+            warning(f"Unknown road type: {category}, using default")
+            road_type = RoadType.PRIMARY
+        if simplify > 0:
+            road_geometry = road_geometry.simplify(simplify, preserve_topology=True)
+        road = Road()
+        road.road_geometry = road_geometry
+        road.road_type = road_type
+        road.tunnel = tunnel
+        road.bridge = bridge
+        road.road_name = road_name
+
+        for v in road.road_geometry.coords:
+            v = (round(v[0], 3), round(v[1], 3))
+            if v not in vertex_map:
+                vertex_map[v] = len(vertex_map)
+            road.road_vertices.append(vertex_map[v])
+        roads.append(road)
+    road_network.roads = roads
+    road_network.georef = Georef(crs=str(layer.crs))
+    road_network.vertices = np.array([[v[0], v[1]] for v in vertex_map.keys()])
     return road_network
 
 
@@ -191,6 +193,7 @@ def load(
     road_datasource: RoadDatasource = RoadDatasource.LM,
     road_attribute_mapping_fn: Callable[[str], Tuple[RoadType, bool, bool]] = None,
     simplify: float = 0,
+    backend=None,
 ) -> RoadNetwork:
     """
     Load a road network from a shapefile and return a `RoadNetwork` object.
@@ -202,6 +205,7 @@ def load(
         road_datasource (RoadDatasource): The data source of the road network (default RoadDatasource.LM).
         road_attribute_mapping_fn (callable): A function to map the road type string to a `RoadType` (default None).
         simplify (float): The tolerance for simplifying the road network (default 0).
+        backend (str): The vector reader to use, "pyogrio" or "fiona" (default None, pyogrio if installed).
 
     Returns:
         RoadNetwork: A `RoadNetwork` object representing the road network loaded from the shapefile.
@@ -217,6 +221,7 @@ def load(
         road_datasource=road_datasource,
         road_attribute_mapping_fn=road_attribute_mapping_fn,
         simplify=simplify,
+        backend=backend,
     )
 
 
@@ -299,10 +304,10 @@ _load_formats = {
     RoadNetwork: {
         ".pb": _load_proto_roadnetwork,
         ".pb2": _load_proto_roadnetwork,
-        ".shp": _load_fiona,
-        ".geojson": _load_fiona,
-        ".json": _load_fiona,
-        ".gpkg": _load_fiona,
+        ".shp": _load_vector,
+        ".geojson": _load_vector,
+        ".json": _load_vector,
+        ".gpkg": _load_vector,
     }
 }
 
@@ -0,0 +1,185 @@
+import sqlite3
+from pathlib import Path
+
+from dtcc_model.geometry import Bounds
+from .logging import info, warning, error
+
+from . import pointcloud
+
+INDEX_FILENAME = ".dtcc_tiles.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiles (
+    name TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    xmin REAL NOT NULL,
+    ymin REAL NOT NULL,
+    zmin REAL NOT NULL,
+    xmax REAL NOT NULL,
+    ymax REAL NOT NULL,
+    zmax REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tiles_xy ON tiles (xmin, xmax, ymin, ymax);
+"""
+
+
+class TileCatalog:
+    """
+    A persistent index of the LAS/LAZ tiles in a directory.
+
+    The header bounds, point count, modification time and size of each
+    tile are stored in an SQLite sidecar file so that bounds queries can
+    be answered without opening any of the tiles.
+    """
+
+    def __init__(self, path, glob="*.la[sz]", index_file=None, readonly=False):
+        """
+        Open (or create) the catalog for a directory of LAS/LAZ files.
+
+        Args:
+            path (str): The path to the directory containing the tiles.
+            glob (str): The glob pattern used to find tiles (default "*.la[sz]").
+            index_file (str): The path to the index file (default `<path>/.dtcc_tiles.sqlite`).
+            readonly (bool): Whether to open an existing index file for lookups only (default False).
+        """
+        self.path = Path(path)
+        if not self.path.is_dir():
+            raise ValueError(f"Path {self.path} is not a directory")
+        self.glob = glob
+        if index_file is None:
+            index_file = self.path / INDEX_FILENAME
+        self.index_file = Path(index_file)
+        self.readonly = readonly
+        if readonly:
+            uri = f"{self.index_file.resolve().as_uri()}?mode=ro"
+            self._db = sqlite3.connect(uri, uri=True)
+        else:
+            self._db = sqlite3.connect(self.index_file)
+            self._db.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+    def update(self):
+        """
+        Bring the catalog up to date with the directory.
+
+        Only tiles that are new or whose modification time or size has
+        changed are opened. Tiles that no longer exist are removed.
+
+        Returns:
+            int: The number of tiles that were added, updated or removed.
+        """
+        if self.readonly:
+            error(f"Unable to update read-only catalog {self.index_file}")
+        known = {
+            name: (mtime, size)
+            for name, mtime, size in self._db.execute(
+                "SELECT name, mtime, size FROM tiles"
+            )
+        }
+        changed = 0
+        found = set()
+        for f in sorted(self.path.glob(self.glob)):
+            stat = f.stat()
+            found.add(f.name)
+            if known.get(f.name) == (stat.st_mtime, stat.st_size):
+                continue
+            try:
+                las_info = pointcloud.las_file_info(f)
+            except Exception as e:
+                warning(f"Unable to read header of {f}: {e}")
+                continue
+            self._db.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    f.name,
+                    stat.st_mtime,
+                    stat.st_size,
+                    las_info["count"],
+                    las_info["x_min"],
+                    las_info["y_min"],
+                    las_info["z_min"],
+                    las_info["x_max"],
+                    las_info["y_max"],
+                    las_info["z_max"],
+                ),
+            )
+            changed += 1
+        removed = set(known) - found
+        self._db.executemany(
+            "DELETE FROM tiles WHERE name = ?", [(name,) for name in removed]
+        )
+        changed += len(removed)
+        self._db.commit()
+        if changed > 0:
+            info(f"Updated {changed} tile(s) in catalog {self.index_file}")
+        return changed
+
+    def entries(self, bounds: Bounds = None):
+        """
+        Return the catalog entries, optionally restricted to a bounding box.
+
+        Args:
+            bounds (Bounds): Only return tiles intersecting the bounding box (default None).
+
+        Returns:
+            list[dict]: One dictionary per tile with the keys `path`, `bounds`, `count`,
+            and the `mtime` and `size` of the file when it was indexed.
+        """
+        query = (
+            "SELECT name, mtime, size, count, xmin, ymin, zmin, xmax, ymax, zmax"
+            " FROM tiles"
+        )
+        params = ()
+        if bounds is not None:
+            query += " WHERE xmax >= ? AND xmin <= ? AND ymax >= ? AND ymin <= ?"
+            params = (bounds.xmin, bounds.xmax, bounds.ymin, bounds.ymax)
+        query += " ORDER BY name"
+        entries = []
+        for row in self._db.execute(query, params):
+            name, mtime, size, count, xmin, ymin, zmin, xmax, ymax, zmax = row
+            entries.append(
+                {
+                    "path": self.path / name,
+                    "bounds": Bounds(xmin, ymin, xmax, ymax, zmin=zmin, zmax=zmax),
+                    "count": count,
+                    "mtime": mtime,
+                    "size": size,
+                }
+            )
+        return entries
+
+    def query(self, bounds: Bounds = None):
+        """
+        Return the paths of the tiles intersecting a bounding box.
+
+        Args:
+            bounds (Bounds): The bounding box (default None, all tiles).
+
+        Returns:
+            list[Path]: The paths of the intersecting tiles, sorted by name.
+        """
+        return [e["path"] for e in self.entries(bounds)]
+
+    @property
+    def bounds(self):
+        """The union of the bounds of all tiles in the catalog."""
+        row = self._db.execute(
+            "SELECT MIN(xmin), MIN(ymin), MIN(zmin), MAX(xmax), MAX(ymax), MAX(zmax) FROM tiles"
+        ).fetchone()
+        if row[0] is None:
+            return None
+        xmin, ymin, zmin, xmax, ymax, zmax = row
+        return Bounds(xmin, ymin, xmax, ymax, zmin=zmin, zmax=zmax)
@@ -0,0 +1,210 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import shapely
+import shapely.geometry
+import fiona
+import pyproj
+
+from .utils import get_epsg
+from .logging import info, warning, error
+
+try:
+    import pyogrio
+    import pyogrio.raw
+    import pyogrio.errors
+
+    HAS_PYOGRIO = True
+except ImportError:
+    HAS_PYOGRIO = False
+
+BACKENDS = ("pyogrio", "fiona")
+
+
+@dataclass
+class VectorLayer:
+    """
+    The features of a vector layer, stored column by column.
+
+    Attributes:
+        geometries (np.ndarray): The shapely geometry of each feature (None if missing).
+        columns (dict): The values of each attribute, as arrays indexed by feature.
+        crs (str): The coordinate reference system, for example "EPSG:3006".
+    """
+
+    geometries: np.ndarray
+    columns: dict
+    crs: str = ""
+
+    def __len__(self):
+        return len(self.geometries)
+
+    def properties(self, index=None):
+        """
+        Return the attributes of the features as dictionaries.
+
+        Args:
+            index (np.ndarray): The indices of the features (default None, all).
+
+        Returns:
+            list[dict]: One dictionary of attribute values per feature.
+        """
+        if index is None:
+            index = np.arange(len(self))
+        names = list(self.columns)
+        values = [np.asarray(self.columns[name])[index].tolist() for name in names]
+        if len(names) == 0:
+            return [{} for _ in index]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def read_layer(
+    path,
+    layer=None,
+    bbox=None,
+    columns=None,
+    skip_features=0,
+    max_features=None,
+    backend=None,
+) -> VectorLayer:
+    """
+    Read all features of a vector layer in bulk.
+
+    With pyogrio the geometries are read as one WKB array and the attributes
+    as NumPy columns. Without it, the features are read through fiona.
+
+    Args:
+        path (str): The path to the file.
+        layer (str): The name of the layer (default None, the first layer).
+        bbox (tuple): Only read features intersecting (xmin, ymin, xmax, ymax),
+            using the spatial index of the file if it has one (default None).
+        columns (list): The attributes to read, other attributes are skipped by the
+            driver (default None, all).
+        skip_features (int): The number of features to skip (default 0).
+        max_features (int): The maximum number of features to read (default None, all).
+        backend (str): The reader to use, "pyogrio" or "fiona" (default None, pyogrio if installed).
+
+    Returns:
+        VectorLayer: The geometries, attributes and CRS of the features.
+    """
+    path = Path(path)
+    if not path.is_file():
+        raise FileNotFoundError(f"File {path} not found")
+    if backend is None:
+        backend = "pyogrio" if HAS_PYOGRIO else "fiona"
+    if backend not in BACKENDS:
+        error(f"Unknown vector reader backend: {backend}")
+    if backend == "pyogrio" and not HAS_PYOGRIO:
+        warning("pyogrio is not installed; reading features with fiona")
+        backend = "fiona"
+    if backend == "pyogrio":
+        vector_layer = _read_pyogrio(
+            path, layer, bbox, columns, skip_features, max_features
+        )
+    else:
+        vector_layer = _read_fiona(
+            path, layer, bbox, columns, skip_features, max_features
+        )
+    info(f"Read {len(vector_layer)} features from {path} using {backend}")
+    return vector_layer
+
+
+def _read_pyogrio(path, layer, bbox, columns, skip_features, max_features):
+    try:
+        meta, _, geometry, field_data = pyogrio.raw.read(
+            path,
+            layer=layer,
+            bbox=bbox,
+            columns=columns,
+            skip_features=skip_features,
+            max_features=max_features,
+            datetime_as_string=True,
+        )
+    except pyogrio.errors.DataSourceError:
+        raise ValueError(f"File {path} is not a valid file format")
+    columns = {
+        name: _restore_nulls(values, dtype)
+        for name, values, dtype in zip(meta["fields"], field_data, meta["dtypes"])
+    }
+    return VectorLayer(
+        geometries=shapely.from_wkb(geometry),
+        columns=columns,
+        crs=_crs_to_epsg(meta["crs"]),
+    )
+
+
+def _restore_nulls(values, dtype):
+    # pyogrio returns null integers and floats as NaN (integer columns with
+    # nulls are read as float); return them as None, like fiona does
+    if values.dtype.kind != "f":
+        return values
+    null = np.isnan(values)
+    if not null.any():
+        return values
+    restored = np.empty(len(values), dtype=object)
+    restored[~null] = values[~null].astype(dtype).tolist()
+    return restored
+
+
+def _read_fiona(path, layer, bbox, columns, skip_features, max_features):
+    try:
+        with fiona.open(path, layer=layer) as src:
+            names = list(src.schema["properties"])
+        ignore_fields = None
+        if columns is not None:
+            ignore_fields = [name for name in names if name not in columns]
+            names = [name for name in names if name in columns]
+        src = fiona.open(path, layer=layer, ignore_fields=ignore_fields)
+    except fiona.errors.DriverError:
+        raise ValueError(f"File {path} is not a valid file format")
+    with src:
+        stop = None if max_features is None else skip_features + max_features
+        features = src.filter(skip_features, stop, bbox=bbox)
+        geometries = []
+        values = {name: [] for name in names}
+        for s in features:
+            geometry = s["geometry"]
+            geometries.append(
+                None if geometry is None else shapely.geometry.shape(geometry)
+            )
+            for name in names:
+                values[name].append(s["properties"][name])
+        crs = get_epsg(src.crs).upper()
+    array = np.empty(len(geometries), dtype=object)
+    array[:] = geometries
+    return VectorLayer(
+        geometries=array,
+        columns={name: np.array(v, dtype=object) for name, v in values.items()},
+        crs=crs,
+    )
+
+
+def count_features(path, layer=None):
+    """
+    Return the number of features in a vector layer without reading them.
+
+    Args:
+        path (str): The path to the file.
+        layer (str): The name of the layer (default None, the first layer).
+
+    Returns:
+        int: The number of features in the layer.
+    """
+    if HAS_PYOGRIO:
+        return pyogrio.read_info(path, layer=layer)["features"]
+    with fiona.open(path, layer=layer) as src:
+        return len(src)
+
+
+def _crs_to_epsg(crs):
+    epsg = None
+    if crs:
+        crs = pyproj.CRS.from_user_input(crs)
+        epsg = crs.to_epsg()
+        if epsg is None:
+            epsg = crs.to_epsg(20)
+    if epsg is None:
+        warning("Cannot determine crs, assuming EPSG:3006")
+        epsg = 3006
+    return f"EPSG:{epsg}"
@@ -24,6 +24,11 @@ class TestPointcloudInfo(unittest.TestCase):
         self.assertEqual(pc_ifno["z_min"], 1.0)
         self.assertEqual(pc_ifno["z_max"], 11.0)
 
+    def test_header_fields(self):
+        pc_info = info.info_pointcloud(las_file)
+        self.assertEqual(pc_info["point_format"], 0)
+        self.assertEqual(pc_info["crs"], "WGS 84 / Pseudo-Mercator")
+
 
 class TestVectorInfo(unittest.TestCase):
     def test_feature_count(self):
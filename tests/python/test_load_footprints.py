@@ -4,6 +4,9 @@ import tempfile
 import json
 from pathlib import Path
 
+import fiona
+import numpy as np
+
 import dtcc_io as io
 from dtcc_model import Bounds
 from dtcc_model import Building
@@ -50,6 +53,200 @@ class TestCity(unittest.TestCase):
         )
         self.assertEqual(len(buildings), 5)
 
+    def test_load_with_bounds_filter_gpkg(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gpkg_file = Path(tmpdir) / "footprints.gpkg"
+            with fiona.open(self.building_shp_file) as src:
+                schema = dict(src.schema, geometry="Unknown")
+                with fiona.open(
+                    gpkg_file, "w", driver="GPKG", schema=schema, crs=src.crs
+                ) as dst:
+                    dst.writerecords(src)
+            buildings = io.load_footprints(
+                gpkg_file, "uuid", bounds=Bounds(-7, -18, 9, -5), min_edge_distance=0
+            )
+            all_buildings = io.load_footprints(
+                gpkg_file, "uuid", bounds=Bounds(-7, -18, 15, 0), min_edge_distance=0
+            )
+            no_buildings = io.load_footprints(
+                gpkg_file, "uuid", bounds=Bounds(100, 100, 110, 110)
+            )
+        self.assertEqual(len(buildings), 1)
+        self.assertEqual(len(all_buildings), 5)
+        self.assertEqual(len(no_buildings), 0)
+
+    def test_load_invalid_and_clockwise(self):
+        features = [
+            {
+                "type": "Feature",
+                "properties": {"uuid": "cw", "height": 5.0},
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[[0, 0], [0, 10], [10, 10], [10, 0], [0, 0]]],
+                },
+            },
+            {
+                "type": "Feature",
+                "properties": {"uuid": "bowtie", "height": 3.0},
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[[20, 0], [30, 10], [30, 0], [20, 10], [20, 0]]],
+                },
+            },
+            {
+                "type": "Feature",
+                "properties": {"uuid": "spike", "height": 3.0},
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [
+                        [
+                            [40, 0],
+                            [50, 10],
+                            [50, 0],
+                            [40, 10],
+                            [40, 0],
+                            [35, -5],
+                            [40, 0],
+                        ]
+                    ],
+                },
+            },
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            geojson_file = Path(tmpdir) / "footprints.geojson"
+            geojson_file.write_text(
+                json.dumps({"type": "FeatureCollection", "features": features})
+            )
+            buildings = io.load_footprints(geojson_file, "uuid", height_field="height")
+        self.assertEqual(
+            [b.id for b in buildings], ["cw", "bowtie", "bowtie", "spike", "spike"]
+        )
+        for building in buildings:
+            vertices = building.geometry[GeometryType.LOD0].vertices
+            x, y = vertices[:, 0], vertices[:, 1]
+            area = np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y) / 2
+            self.assertTrue(area > 0)
+            self.assertFalse(np.allclose(vertices[0], vertices[-1]))
+        self.assertEqual(
+            buildings[0].geometry[GeometryType.LOD0].vertices.shape, (4, 3)
+        )
+        self.assertTrue(
+            (buildings[0].geometry[GeometryType.LOD0].vertices[:, 2] == 5.0).all()
+        )
+
+    def test_load_backends(self):
+        pyogrio_buildings = io.load_footprints(
+            self.building_shp_file, "uuid", backend="pyogrio"
+        )
+        fiona_buildings = io.load_footprints(
+            self.building_shp_file, "uuid", backend="fiona"
+        )
+        self.assertEqual(len(pyogrio_buildings), len(fiona_buildings))
+        for b1, b2 in zip(pyogrio_buildings, fiona_buildings):
+            self.assertEqual(b1.id, b2.id)
+            self.assertEqual(b1.attributes, b2.attributes)
+            np.testing.assert_allclose(
+                b1.geometry[GeometryType.LOD0].vertices,
+                b2.geometry[GeometryType.LOD0].vertices,
+            )
+            self.assertEqual(
+                b1.geometry[GeometryType.LOD0].transform.srs,
+                b2.geometry[GeometryType.LOD0].transform.srs,
+            )
+
+    def test_load_backends_null_attributes(self):
+        schema = {
+            "geometry": "Polygon",
+            "properties": {"uuid": "int", "height": "float", "name": "str"},
+        }
+        square = {
+            "type": "Polygon",
+            "coordinates": [[(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)]],
+        }
+        with tempfile.TemporaryDirectory() as tmpdir:
+            gpkg_file = Path(tmpdir) / "nulls.gpkg"
+            with fiona.open(
+                gpkg_file, "w", driver="GPKG", schema=schema, crs="EPSG:3006"
+            ) as dst:
+                dst.write(
+                    {
+                        "geometry": square,
+                        "properties": {"uuid": 1, "height": None, "name": None},
+                    }
+                )
+                dst.write(
+                    {
+                        "geometry": square,
+                        "properties": {"uuid": None, "height": 2.0, "name": "b"},
+                    }
+                )
+            results = [
+                io.load_footprints(
+                    gpkg_file, "uuid", height_field="height", backend=backend
+                )
+                for backend in ("pyogrio", "fiona")
+            ]
+        for buildings in results:
+            self.assertEqual([b.id for b in buildings], ["1", "None"])
+            self.assertEqual(buildings[0].attributes["height"], None)
+            self.assertEqual(buildings[1].attributes["uuid"], None)
+            heights = [b.geometry[GeometryType.LOD0].vertices[0, 2] for b in buildings]
+            self.assertEqual(heights, [0.0, 2.0])
+        self.assertEqual(
+            [b.attributes for b in results[0]], [b.attributes for b in results[1]]
+        )
+
+    def test_load_fields(self):
+        for backend in ("pyogrio", "fiona"):
+            buildings = io.load_footprints(
+                self.building_shp_file,
+                "uuid",
+                height_field="height",
+                fields=[],
+                backend=backend,
+            )
+            self.assertEqual(len(buildings), 5)
+            self.assertEqual(set(buildings[0].attributes), {"uuid", "height"})
+            buildings = io.load_footprints(
+                self.building_shp_file, "uuid", fields=["id"], backend=backend
+            )
+            self.assertEqual(set(buildings[0].attributes), {"uuid", "id"})
+
+    def test_load_partitioned(self):
+        def write_part(path, records, driver):
+            with fiona.open(self.building_shp_file) as src:
+                schema = dict(src.schema, geometry="Unknown")
+                with fiona.open(
+                    path, "w", driver=driver, schema=schema, crs=src.crs
+                ) as dst:
+                    dst.writerecords(records)
+
+        with fiona.open(self.building_shp_file) as src:
+            records = list(src)
+        single = io.load_footprints(self.building_shp_file, "uuid")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            for i, record in enumerate(records):
+                write_part(tmpdir / f"part_{i}.shp", [record], "ESRI Shapefile")
+            write_part(tmpdir / "all.gpkg", records, "GPKG")
+            from_dir = io.load_footprints(tmpdir, "uuid")
+            from_dir_parallel = io.load_footprints(tmpdir, "uuid", workers=2)
+            from_glob = io.load_footprints(tmpdir / "part_*.shp", "uuid")
+            from_ranges = io.load_footprints(tmpdir / "all.gpkg", "uuid", workers=2)
+            in_bounds = io.load_footprints(
+                tmpdir,
+                "uuid",
+                bounds=Bounds(-7, -18, 9, -5),
+                min_edge_distance=0,
+                workers=2,
+            )
+        expected = [b.id for b in single]
+        self.assertEqual([b.id for b in from_dir], expected)
+        self.assertEqual([b.id for b in from_dir_parallel], expected)
+        self.assertEqual([b.id for b in from_glob], expected)
+        self.assertEqual([b.id for b in from_ranges], expected)
+        self.assertEqual(len(in_bounds), 1)
+
     def test_read_crs(self):
         buildings = io.load_footprints(self.building_shp_file)
         building = buildings[2]
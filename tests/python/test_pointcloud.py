@@ -5,6 +5,14 @@ import json
 import dtcc_io as io
 from dtcc_model import Bounds, PointCloud
 import tempfile
+import asyncio
+import numpy as np
+import shutil
+import copy
+from unittest import mock
+import laspy
+import shapely
+from shapely.geometry import Polygon
 
 
 class TestPointcloud(unittest.TestCase):
@@ -12,6 +20,7 @@ class TestPointcloud(unittest.TestCase):
     def setUpClass(cls):
         cls.data_dir = (Path(__file__).parent / ".." / "data" / "MinimalCase").resolve()
         cls.building_las_file = str((cls.data_dir / "pointcloud.las").resolve())
+        cls.copc_file = str((cls.data_dir / ".." / "pointcloud.copc.laz").resolve())
 
     def test_load_pointcloud(self):
         pc = io.load_pointcloud(self.building_las_file)
@@ -28,6 +37,540 @@ class TestPointcloud(unittest.TestCase):
         self.assertEqual(len(pc.points), 64)
         self.assertEqual(len(pc.classification), 64)
 
+    def test_load_pointcloud_from_dir_bounded(self):
+        pc = io.load_pointcloud(self.data_dir, bounds=Bounds(-2, -2, 0, 0))
+        self.assertEqual(len(pc.points), 64)
+
+    def test_load_pointcloud_from_dir_skip_tiles(self):
+        tiles, skipped_tiles, skipped_points = io.pointcloud._select_tiles(
+            self.data_dir, "*.la[sz]", Bounds(100, 100, 200, 200)
+        )
+        self.assertEqual(len(tiles), 0)
+        self.assertEqual(skipped_tiles, 1)
+        self.assertEqual(skipped_points, 8148)
+        pc = io.load_pointcloud(self.data_dir, bounds=Bounds(100, 100, 200, 200))
+        self.assertEqual(len(pc.points), 0)
+
+    def test_iter_pointcloud_chunks(self):
+        chunks = list(
+            io.iter_pointcloud_chunks(self.building_las_file, chunk_size=1000)
+        )
+        self.assertEqual(len(chunks), 9)
+        self.assertEqual(sum(len(c.points) for c in chunks), 8148)
+        self.assertEqual(len(chunks[0].classification), 1000)
+        self.assertEqual(len(chunks[0].intensity), 1000)
+
+    def test_iter_pointcloud_chunks_from_dir_bounded(self):
+        chunks = io.iter_pointcloud_chunks(
+            self.data_dir,
+            chunk_size=1000,
+            bounds=Bounds(-2, -2, 0, 0),
+            fields=("classification",),
+        )
+        self.assertEqual(sum(len(c.points) for c in chunks), 64)
+
+    def test_load_pointcloud_from_dir_parallel(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ["a.las", "b.las", "c.las"]:
+                shutil.copy(self.building_las_file, Path(tmpdir) / name)
+            pc = io.load_pointcloud(tmpdir)
+            pc_parallel = io.load_pointcloud(tmpdir, workers=2)
+        self.assertEqual(len(pc_parallel.points), 3 * 8148)
+        self.assertTrue((pc.points == pc_parallel.points).all())
+        self.assertTrue((pc.classification == pc_parallel.classification).all())
+
+    def test_load_pointcloud_from_dir_prefetch(self):
+        async def collect(path):
+            return [
+                pc async for pc in io.aiter_pointcloud_chunks(path, chunk_size=1000)
+            ]
+
+        async def first(path):
+            async for pc in io.aiter_pointcloud_chunks(path, chunk_size=1000):
+                return pc
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ["a.las", "b.las", "c.las"]:
+                shutil.copy(self.building_las_file, Path(tmpdir) / name)
+            pc = io.load_pointcloud(tmpdir)
+            pc_prefetch = io.load_pointcloud(tmpdir, prefetch=2, memory_budget=1)
+            chunks = asyncio.run(collect(tmpdir))
+            pc_first = asyncio.run(first(tmpdir))
+        self.assertTrue((pc.points == pc_prefetch.points).all())
+        self.assertEqual(len(chunks), 27)
+        self.assertEqual(sum(len(c.points) for c in chunks), 3 * 8148)
+        self.assertEqual(len(pc_first.points), 1000)
+
+    def test_aiter_pointcloud_chunks_cancelled(self):
+        async def consume(path, started):
+            async for pc in io.aiter_pointcloud_chunks(path, chunk_size=100):
+                started.set()
+
+        async def cancel(path):
+            started = asyncio.Event()
+            task = asyncio.create_task(consume(path, started))
+            await started.wait()
+            # The task is cancelled while the next chunk is being decoded
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for i in range(30):
+                shutil.copy(self.building_las_file, Path(tmpdir) / f"{i:02d}.las")
+            for _ in range(4):
+                asyncio.run(cancel(tmpdir))
+
+    def test_load_pointcloud_filtered(self):
+        pc = io.load_pointcloud(
+            self.building_las_file, point_filter=io.PointFilter(classification=(1,))
+        )
+        self.assertEqual(len(pc.points), 1895)
+        self.assertEqual(pc.used_classifications(), {1})
+        pc = io.load_pointcloud(
+            self.building_las_file, point_filter=io.PointFilter(z_range=(0, 2))
+        )
+        self.assertTrue(len(pc.points) > 0)
+        self.assertTrue((pc.points[:, 2] <= 2).all())
+        self.assertEqual(len(pc.points), len(pc.intensity))
+        pc = io.load_pointcloud(
+            self.building_las_file, point_filter=io.PointFilter(return_number=(2,))
+        )
+        self.assertEqual(len(pc.points), 0)
+
+    def test_load_pointcloud_decimated(self):
+        decimate = io.Decimation(fraction=0.1)
+        pc = io.load_pointcloud(self.building_las_file, decimate=decimate)
+        self.assertTrue(600 < len(pc.points) < 1000)
+        self.assertEqual(len(pc.points), len(pc.classification))
+        chunks = io.iter_pointcloud_chunks(
+            self.building_las_file, chunk_size=1000, decimate=decimate
+        )
+        points = np.vstack([c.points for c in chunks])
+        self.assertTrue((pc.points == points).all())
+        pc = io.load_pointcloud(
+            self.building_las_file,
+            decimate=io.Decimation(voxel_size=2.0),
+            point_filter=io.PointFilter(classification=(1,)),
+        )
+        self.assertTrue(0 < len(pc.points) < 1895)
+        self.assertEqual(pc.used_classifications(), {1})
+        voxels = np.floor(pc.points / 2.0)
+        self.assertEqual(len(np.unique(voxels, axis=0)), len(pc.points))
+
+    def test_load_pointcloud_clipped(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        triangle = Polygon([(-6, -6), (4, -6), (-6, 4)])
+        square = Polygon([(-2, -2), (0, -2), (0, 0), (-2, 0)])
+        inside = shapely.contains_xy(triangle, pc.points[:, 0], pc.points[:, 1])
+        pc_clipped = io.load_pointcloud(self.building_las_file, clip=triangle)
+        self.assertTrue(0 < len(pc_clipped.points) < len(pc.points))
+        self.assertTrue((pc_clipped.points == pc.points[inside]).all())
+        self.assertEqual(len(pc_clipped.classification), len(pc_clipped.points))
+        pc_dir = io.load_pointcloud(self.data_dir, clip=[triangle, square])
+        self.assertTrue(len(pc_dir.points) >= len(pc_clipped.points))
+        indices = io.clip_pointcloud_indices(pc, [triangle, square])
+        self.assertEqual(len(indices), 2)
+        self.assertTrue((indices[0] == np.flatnonzero(inside)).all())
+        self.assertTrue((np.diff(indices[1]) > 0).all())
+        self.assertEqual(len(pc_dir.points), len(np.union1d(*indices)))
+
+    def test_load_pointcloud_mmap(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        pc_mmap = io.load_pointcloud(self.building_las_file, mmap=True)
+        self.assertTrue((pc.points == pc_mmap.points).all())
+        self.assertTrue((pc.classification == pc_mmap.classification).all())
+        self.assertTrue((pc.intensity == pc_mmap.intensity).all())
+        self.assertFalse(pc_mmap.intensity.flags.writeable)
+
+    def test_load_pointcloud_mmap_compact(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            las_file = Path(tmpdir) / "scaled.las"
+            header = laspy.LasHeader(point_format=1, version="1.2")
+            header.scales = np.array([0.001, 0.001, 0.001])
+            header.offsets = np.array([100.0, 200.0, 0.0])
+            las = laspy.LasData(header)
+            las.x, las.y, las.z = (pc.points + (100, 200, 0)).T
+            las.classification = pc.classification
+            las.write(las_file)
+            pc_mmap = io.load_pointcloud(las_file, mmap=True)
+            pc_int = io.load_pointcloud(
+                las_file, mmap=True, compact=io.CompactPoints(dtype=np.int32)
+            )
+            pc_bounded = io.load_pointcloud(
+                las_file,
+                mmap=True,
+                bounds=Bounds(98, 198, 100, 200),
+                compact=io.CompactPoints(dtype=np.int32),
+            )
+            # The integer coordinates are a view of the file, not a copy
+            self.assertEqual(pc_int.points.dtype, np.int32)
+            self.assertFalse(pc_int.points.flags.owndata)
+            self.assertFalse(pc_int.points.flags.writeable)
+            world = io.pointcloud_world_points(pc_int)
+            self.assertTrue(np.allclose(world, pc_mmap.points, rtol=0, atol=1e-9))
+            self.assertAlmostEqual(pc_int.bounds.xmin, pc_mmap.bounds.xmin)
+            self.assertTrue((pc_int.classification == pc.classification).all())
+            self.assertEqual(len(pc_bounded.points), 64)
+            x = io.pointcloud_world_points(pc_bounded)[:, 0]
+            self.assertTrue(((x >= 98) & (x <= 100)).all())
+
+    def test_load_copc(self):
+        pc = io.load_pointcloud(self.copc_file)
+        self.assertEqual(len(pc.points), 8148)
+        self.assertEqual(len(pc.used_classifications()), 2)
+
+    def test_load_copc_bounded(self):
+        pc = io.load_pointcloud(self.copc_file, bounds=Bounds(-2, -2, 0, 0))
+        self.assertEqual(len(pc.points), 64)
+
+    def test_load_copc_level(self):
+        pc = io.load_pointcloud(self.copc_file, level=0)
+        self.assertEqual(len(pc.points), 1019)
+        pc = io.load_pointcloud(self.copc_file, resolution=100.0)
+        self.assertEqual(len(pc.points), 1019)
+
+    def test_load_csv_pointcloud(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_file = Path(tmpdir) / "pointcloud.csv"
+            data = np.column_stack((pc.points, pc.classification, pc.intensity))
+            np.savetxt(csv_file, data, delimiter=",", header="x,y,z,c,i", comments="")
+            pc_csv = io.load_pointcloud(csv_file, usecols=(0, 1, 2, 3))
+            pc_bounded = io.load_pointcloud(csv_file, bounds=Bounds(-2, -2, 0, 0))
+            chunks = list(io.iter_pointcloud_chunks(csv_file, chunk_size=1000))
+            csv_info = io.pointcloud.csv_file_info(csv_file)
+        self.assertEqual(len(pc_csv.points), 8148)
+        self.assertTrue(np.allclose(pc_csv.points, pc.points))
+        self.assertTrue((pc_csv.classification == pc.classification).all())
+        self.assertEqual(len(pc_bounded.points), 64)
+        self.assertEqual(len(chunks), 9)
+        self.assertEqual(csv_info["count"], 8148)
+        self.assertAlmostEqual(csv_info["x_min"], -8.01747, places=3)
+        self.assertAlmostEqual(csv_info["z_max"], 11.0, places=3)
+
+    def test_csv_parsers(self):
+        data = np.random.default_rng(0).uniform(-10, 10, (2500, 5)).round(3)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_file = Path(tmpdir) / "pointcloud.csv"
+            np.savetxt(csv_file, data, delimiter=",", header="x,y,z,c,i", comments="")
+            has_pyarrow = io.pointcloud.HAS_PYARROW
+            blocks = {}
+            try:
+                for backend in (True, False):
+                    io.pointcloud.HAS_PYARROW = backend
+                    blocks[backend] = list(
+                        io.pointcloud._iter_csv_arrays(
+                            csv_file, 1000, usecols=(2, 0, 1)
+                        )
+                    )
+            finally:
+                io.pointcloud.HAS_PYARROW = has_pyarrow
+        for backend_blocks in blocks.values():
+            self.assertEqual([len(b) for b in backend_blocks], [1000, 1000, 500])
+            self.assertTrue((np.vstack(backend_blocks) == data[:, [2, 0, 1]]).all())
+
+    def test_save_laz_pointcloud(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outpath = Path(tmpdir) / "pointcloud.laz"
+            pc.save(outpath)
+            las_info = io.pointcloud.las_file_info(outpath)
+            pc2 = io.load_pointcloud(outpath)
+        self.assertEqual(las_info["point_format"], 0)
+        self.assertTrue(np.allclose(pc.points, pc2.points, atol=1e-3))
+        for field in io.pointcloud.POINTCLOUD_FIELDS:
+            self.assertTrue((getattr(pc, field) == getattr(pc2, field)).all())
+
+    def test_las_writer_chunked(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outpath = Path(tmpdir) / "pointcloud.laz"
+            with io.pointcloud.LasWriter(outpath) as writer:
+                for chunk in io.iter_pointcloud_chunks(
+                    self.building_las_file, chunk_size=1000
+                ):
+                    writer.write(chunk)
+            with io.pointcloud.LasWriter(outpath, append=True) as writer:
+                for chunk in io.iter_pointcloud_chunks(
+                    self.building_las_file, chunk_size=5000
+                ):
+                    writer.write(chunk)
+            pc = io.load_pointcloud(outpath)
+        self.assertEqual(len(pc.points), 2 * 8148)
+        self.assertAlmostEqual(pc.bounds.xmin, -8.01747, places=2)
+
+    def test_save_las_format_from_all_chunks(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        pc.classification[-1] = 40
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outpath = Path(tmpdir) / "pointcloud.las"
+            io.save_pointcloud(pc, outpath, chunk_size=1000)
+            las_info = io.pointcloud.las_file_info(outpath)
+            pc2 = io.load_pointcloud(outpath)
+        self.assertEqual(las_info["point_format"], 6)
+        self.assertTrue((pc.classification == pc2.classification).all())
+
+    def test_save_csv_pointcloud(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        pc.points[0] = [-0.0004, 12.5, -3.25]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outpath = Path(tmpdir) / "pointcloud.csv"
+            pc.save(outpath)
+            data = np.loadtxt(outpath, delimiter=",", skiprows=1)
+            header, first_line = outpath.read_text().splitlines()[:2]
+        self.assertEqual(
+            header, "x,y,z,classification,intensity,return_number,num_returns"
+        )
+        self.assertEqual(data.shape, (8148, 7))
+        self.assertTrue(np.allclose(data[:, :3], pc.points, atol=5e-4))
+        self.assertTrue((data[:, 3] == pc.classification).all())
+        self.assertTrue((data[:, 4] == pc.intensity).all())
+        self.assertTrue(first_line.startswith("0.000,12.500,-3.250,"))
+
+    def test_save_csv_pointcloud_partial_fields(self):
+        pc = io.load_pointcloud(self.building_las_file, fields=("intensity",))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outpath = Path(tmpdir) / "pointcloud.csv"
+            pc.save(outpath)
+            header = outpath.read_text().splitlines()[0]
+            pc_csv = io.load_pointcloud(outpath)
+            pc.classification = io.load_pointcloud(
+                self.building_las_file
+            ).classification
+            pc.intensity = np.empty(0, dtype=np.uint16)
+            pc.save(outpath)
+            pc_class = io.load_pointcloud(outpath)
+        self.assertEqual(header, "x,y,z,intensity")
+        self.assertTrue(np.allclose(pc_csv.points, pc.points, atol=5e-4))
+        # The intensity column is not read as classification
+        self.assertTrue((pc_csv.classification == 1).all())
+        self.assertTrue((pc_class.classification == pc.classification).all())
+
+    def test_retile(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            catalog = io.pointcloud.retile(self.data_dir, tmpdir, 10.0, suffix=".las")
+            entries = catalog.entries()
+            catalog.close()
+            pc = io.load_pointcloud(tmpdir)
+            self.assertEqual(len(entries), 9)
+            self.assertEqual(sum(e["count"] for e in entries), 8148)
+            self.assertEqual(len(pc.points), 8148)
+            for e in entries:
+                x0, y0 = [float(v) for v in e["path"].stem.split("_")[1:]]
+                self.assertTrue(e["bounds"].xmin >= x0 and e["bounds"].xmax <= x0 + 10)
+                self.assertTrue(e["bounds"].ymin >= y0 and e["bounds"].ymax <= y0 + 10)
+
+    def test_retile_keeps_header_and_dimensions(self):
+        las = laspy.convert(laspy.read(self.building_las_file), point_format_id=3)
+        las.gps_time = np.arange(len(las.points), dtype=np.float64)
+        las.red = np.full(len(las.points), 1000, dtype=np.uint16)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src_dir = Path(tmpdir) / "src"
+            src_dir.mkdir()
+            las.write(src_dir / "pointcloud.las")
+            tile_dir = Path(tmpdir) / "tiles"
+            # Leftovers of an interrupted run must not end up in the tiles
+            (tile_dir / ".parts").mkdir(parents=True)
+            shutil.copy(src_dir / "pointcloud.las", tile_dir / ".parts" / "0_0_0.las")
+            io.pointcloud.retile(src_dir, tile_dir, 10.0, suffix=".las").close()
+            tiles = [laspy.read(f) for f in sorted(tile_dir.glob("*.las"))]
+            self.assertFalse((tile_dir / ".parts").exists())
+        self.assertEqual(sum(len(t.points) for t in tiles), len(las.points))
+        for tile in tiles:
+            self.assertEqual(tile.header.point_format.id, 3)
+            self.assertEqual(tile.header.parse_crs(), las.header.parse_crs())
+            self.assertTrue((tile.red == 1000).all())
+        gps_time = np.sort(np.concatenate([t.gps_time for t in tiles]))
+        self.assertTrue((gps_time == las.gps_time).all())
+
+    def test_retile_buffered_parallel(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            catalog = io.pointcloud.retile(
+                self.data_dir, tmpdir, 10.0, buffer=1.0, workers=2
+            )
+            count = sum(e["count"] for e in catalog.entries())
+            catalog.close()
+        self.assertTrue(count > 8148)
+
+    def test_load_pointcloud_without_outliers(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        noise = PointCloud()
+        noise.points = np.array([[-5.0, -5.0, 200.0], [0.0, 5.0, -100.0]])
+        noise.classification = np.ones(2, dtype=np.uint8)
+        noise.intensity = np.zeros(2, dtype=np.uint16)
+        noise.return_number = np.ones(2, dtype=np.uint8)
+        noise.num_returns = np.ones(2, dtype=np.uint8)
+        pc.merge(noise)
+        radius = io.OutlierFilter(method="radius", radius=2.0, neighbors=2)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src_dir = Path(tmpdir) / "src"
+            src_dir.mkdir()
+            pc.save(src_dir / "pointcloud.las")
+            pc_clean = io.load_pointcloud(
+                src_dir / "pointcloud.las", outliers=io.OutlierFilter()
+            )
+            self.assertEqual(len(pc_clean.classification), len(pc_clean.points))
+            self.assertTrue((np.abs(pc_clean.points[:, 2]) < 100).all())
+            tile_dir = Path(tmpdir) / "tiles"
+            io.pointcloud.retile(src_dir, tile_dir, 10.0, suffix=".las").close()
+            pc_tiles = io.load_pointcloud(tile_dir)
+            expected = pc_tiles.points[radius.mask(pc_tiles.points)]
+            pc_dir = io.load_pointcloud(tile_dir, outliers=radius)
+            pc_parallel = io.load_pointcloud(tile_dir, outliers=radius, workers=2)
+            bounds = Bounds(-5, -15, 5, -5)
+            pc_bounded = io.load_pointcloud(tile_dir, bounds=bounds, outliers=radius)
+        self.assertTrue((np.abs(expected[:, 2]) < 100).all())
+        self.assertEqual(len(pc_dir.points), len(expected))
+        self.assertTrue((pc_dir.points == expected).all())
+        self.assertTrue((pc_parallel.points == expected).all())
+        # Points of the tiles outside the bounds are used as halo
+        inside = (expected[:, 0] >= -5) & (expected[:, 0] <= 5)
+        inside &= (expected[:, 1] >= -15) & (expected[:, 1] <= -5)
+        self.assertEqual(len(pc_bounded.points), np.count_nonzero(inside))
+        self.assertTrue((pc_bounded.points == expected[inside]).all())
+
+    def test_load_pointcloud_without_outliers_overlapping(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        radius = io.OutlierFilter(method="radius", radius=0.6, neighbors=10)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # Two flight lines overlapping in -2 <= x <= 2
+            for name, keep in [
+                ("a.las", pc.points[:, 0] <= 2),
+                ("b.las", pc.points[:, 0] >= -2),
+            ]:
+                io.pointcloud._apply_mask(copy.deepcopy(pc), keep).save(
+                    Path(tmpdir) / name
+                )
+            pc_tiles = io.load_pointcloud(tmpdir)
+            expected = pc_tiles.points[radius.mask(pc_tiles.points)]
+            pc_dir = io.load_pointcloud(tmpdir, outliers=radius)
+        self.assertTrue(len(pc_tiles.points) > len(pc.points))
+        self.assertEqual(len(pc_dir.points), len(expected))
+        self.assertTrue((pc_dir.points == expected).all())
+
+    def test_load_pointcloud_compact(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        pc_float = io.load_pointcloud(
+            self.building_las_file, compact=io.CompactPoints()
+        )
+        self.assertEqual(pc_float.points.dtype, np.float32)
+        world = io.pointcloud_world_points(pc_float)
+        self.assertTrue(np.allclose(world, pc.points, atol=1e-4))
+        self.assertAlmostEqual(pc_float.bounds.xmin, pc.bounds.xmin, places=3)
+        self.assertAlmostEqual(pc_float.bounds.zmax, pc.bounds.zmax, places=3)
+        pc_int = io.load_pointcloud(
+            self.data_dir, compact=io.CompactPoints(dtype=np.int32, origin=(0, 0, 0))
+        )
+        self.assertEqual(pc_int.points.dtype, np.int32)
+        self.assertTrue(
+            np.allclose(io.pointcloud_world_points(pc_int), pc.points, atol=1e-3)
+        )
+        self.assertTrue((pc_int.classification == pc.classification).all())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outpath = Path(tmpdir) / "pointcloud.las"
+            pc_int.save(outpath)
+            pc2 = io.load_pointcloud(outpath)
+        self.assertTrue(np.allclose(pc2.points, pc.points, atol=1e-3))
+
+    def test_save_compact_world_points(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        pc.points = pc.points + (100000.0, 6400000.0, 0.0)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            las_file = Path(tmpdir) / "pointcloud.las"
+            pc.save(las_file)
+            pc_int = io.load_pointcloud(
+                las_file, compact=io.CompactPoints(dtype=np.int32)
+            )
+            pb_file = Path(tmpdir) / "pointcloud.pb"
+            pc_int.save(pb_file)
+            pc_pb = io.load_pointcloud(pb_file)
+            csv_file = Path(tmpdir) / "pointcloud.csv"
+            pc.save(csv_file)
+            pc_csv = io.load_pointcloud(
+                csv_file, dtype=np.float32, compact=io.CompactPoints()
+            )
+        self.assertEqual(pc_pb.points.dtype, np.float64)
+        self.assertTrue(np.allclose(pc_pb.points, pc.points, atol=1e-3))
+        self.assertTrue(np.array_equal(pc_pb.transform.affine, np.eye(4)))
+        # float32 world coordinates are not mistaken for compact points
+        world = io.pointcloud_world_points(pc_csv)
+        self.assertTrue(np.allclose(world, pc.points, atol=1.0))
+        self.assertAlmostEqual(pc_csv.bounds.xmin, pc.points[:, 0].min(), delta=1.0)
+        # A float64 cloud with an affine is converted with it
+        shifted = copy.deepcopy(pc)
+        shifted.transform.affine = np.eye(4)
+        shifted.transform.affine[:3, 3] = (10.0, 20.0, 0.0)
+        world = io.pointcloud_world_points(shifted)
+        self.assertTrue(np.allclose(world, pc.points + (10.0, 20.0, 0.0)))
+
+    def test_save_load_proto_blocks(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outpath = Path(tmpdir) / "pointcloud.pbc"
+            io.save_pointcloud(pc, outpath, block_size=1000)
+            header, index = io.pointcloud.proto_block_info(outpath)
+            pc2 = io.load_pointcloud(outpath)
+            pc_bounded = io.load_pointcloud(outpath, bounds=Bounds(-2, -2, 0, 0))
+            chunks = list(io.iter_pointcloud_chunks(outpath, fields=()))
+        self.assertEqual(len(index), 9)
+        self.assertEqual(sum(e["count"] for e in index), 8148)
+        self.assertEqual(list(header["fields"]), list(io.pointcloud.POINTCLOUD_FIELDS))
+        self.assertTrue((pc2.points == pc.points).all())
+        self.assertTrue((pc2.classification == pc.classification).all())
+        self.assertEqual(len(pc_bounded.points), 64)
+        self.assertEqual(len(chunks), 9)
+        self.assertEqual(len(chunks[0].classification), 0)
+
+    def test_iter_proto_pointcloud_chunks(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outpath = Path(tmpdir) / "pointcloud.pb"
+            io.save_pointcloud(pc, outpath)
+            chunks = list(
+                io.iter_pointcloud_chunks(
+                    outpath, bounds=Bounds(-2, -2, 0, 0), fields=("intensity",)
+                )
+            )
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(len(chunks[0].points), 64)
+        self.assertEqual(len(chunks[0].intensity), 64)
+        self.assertEqual(len(chunks[0].classification), 0)
+
+    def test_save_load_npz(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outpath = Path(tmpdir) / "pointcloud.npz"
+            pc.save(outpath)
+            pc2 = io.load_pointcloud(outpath)
+            pc_mmap = io.load_pointcloud(outpath, mmap=True, fields=("intensity",))
+            pc_bounded = io.load_pointcloud(outpath, bounds=Bounds(-2, -2, 0, 0))
+            self.assertTrue((pc.points == pc2.points).all())
+            self.assertTrue((pc.points == pc_mmap.points).all())
+            self.assertTrue(isinstance(pc_mmap.points, np.memmap))
+            self.assertEqual(len(pc_mmap.classification), 0)
+            self.assertTrue((pc.intensity == pc_mmap.intensity).all())
+            for field in io.pointcloud.POINTCLOUD_FIELDS:
+                self.assertTrue((getattr(pc, field) == getattr(pc2, field)).all())
+            self.assertEqual(len(pc_bounded.points), 64)
+            del pc_mmap
+
+    @unittest.skipUnless(io.pointcloud.HAS_PYARROW, "pyarrow not installed")
+    def test_save_load_parquet(self):
+        pc = io.load_pointcloud(self.building_las_file)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outpath = Path(tmpdir) / "pointcloud.parquet"
+            pc.save(outpath)
+            pc2 = io.load_pointcloud(outpath)
+            pc_bounded = io.load_pointcloud(
+                outpath, bounds=Bounds(-2, -2, 0, 0), points_only=True
+            )
+        self.assertTrue((pc.points == pc2.points).all())
+        for field in io.pointcloud.POINTCLOUD_FIELDS:
+            self.assertTrue((getattr(pc, field) == getattr(pc2, field)).all())
+        self.assertEqual(len(pc_bounded.points), 64)
+        self.assertEqual(len(pc_bounded.classification), 0)
+
     def test_point_cloud_bounds(self):
         bounds = io.pointcloud.calc_las_bounds(self.building_las_file)
         self.assertAlmostEqual(bounds.xmin, -8.01747, places=3)
@@ -35,6 +578,59 @@ class TestPointcloud(unittest.TestCase):
         self.assertAlmostEqual(bounds.xmax, 15.92373, places=3)
         self.assertAlmostEqual(bounds.ymax, 1.83826, places=3)
 
+    def test_las_file_info(self):
+        las_info = io.pointcloud.las_file_info(self.building_las_file)
+        self.assertEqual(las_info["count"], 8148)
+        self.assertEqual(las_info["point_format"], 0)
+        self.assertEqual(las_info["version"], "1.2")
+        self.assertAlmostEqual(las_info["bounds"].xmin, -8.01747, places=3)
+        self.assertAlmostEqual(las_info["z_max"], 11.0, places=3)
+        self.assertEqual(las_info["bounds"].zmin, las_info["z_min"])
+        self.assertEqual(las_info["bounds"].zmax, las_info["z_max"])
+
+    def test_index_dir(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index_file = Path(tmpdir) / "tiles.sqlite"
+            catalog = io.pointcloud.index_dir(self.data_dir, index_file=index_file)
+            # Catalogued and uncatalogued tiles have the same bounds
+            tiles = io.pointcloud._select_tiles(self.data_dir, "*.la[sz]", None)[0]
+            self.assertEqual(
+                io.pointcloud._tiles_bounds(tiles),
+                io.pointcloud._tiles_bounds(catalog.entries()),
+            )
+            self.assertEqual(len(catalog), 1)
+            self.assertEqual(catalog.update(), 0)
+            self.assertEqual(len(catalog.query(Bounds(-2, -2, 0, 0))), 1)
+            self.assertEqual(len(catalog.query(Bounds(100, 100, 200, 200))), 0)
+            self.assertAlmostEqual(catalog.bounds.xmin, -8.01747, places=3)
+            catalog.close()
+
+    def test_load_with_catalog(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tile_dir = Path(tmpdir) / "tiles"
+            tile_dir.mkdir()
+            shutil.copy(self.building_las_file, tile_dir / "a.las")
+            index_file = Path(tmpdir) / "tiles.sqlite"
+            io.pointcloud.index_dir(tile_dir, index_file=index_file).close()
+            mtime = index_file.stat().st_mtime_ns
+            # Headers of indexed tiles are not read again
+            with mock.patch.object(
+                io.pointcloud, "las_file_info", side_effect=AssertionError
+            ):
+                pc = io.load_pointcloud(
+                    tile_dir, bounds=Bounds(-2, -2, 0, 0), catalog=index_file
+                )
+                with io.pointcloud.TileCatalog(
+                    tile_dir, index_file=index_file, readonly=True
+                ) as catalog:
+                    pc_catalog = io.load_pointcloud(tile_dir, catalog=catalog)
+                    with self.assertRaises(RuntimeError):
+                        catalog.update()
+            self.assertEqual(index_file.stat().st_mtime_ns, mtime)
+            self.assertFalse((tile_dir / io.pointcloud.INDEX_FILENAME).exists())
+        self.assertEqual(len(pc.points), 64)
+        self.assertEqual(len(pc_catalog.points), 8148)
+
     def test_save_pointcloud(self):
         pc = io.load_pointcloud(self.building_las_file)
         outfile = tempfile.NamedTemporaryFile(suffix=".las", delete=False)